@@ -3,6 +3,9 @@
  *
  * Usage: node convert_ifc.js <input.ifc> <output.frag>
  *
+ * An input path of "-" reads the IFC bytes from stdin, letting the server
+ * pipe git blob content straight in without a temp file on disk.
+ *
  * Uses @thatopen/fragments IfcLoader to convert IFC files
  * into the Fragment format used by the That Open Company viewer.
  */
@@ -21,8 +24,8 @@ async function convert(inputPath, outputPath) {
   // Configure web-ifc WASM
   await ifcLoader.setup();
 
-  // Read IFC file
-  const ifcData = fs.readFileSync(inputPath);
+  // Read IFC file ("-" = stdin)
+  const ifcData = inputPath === "-" ? fs.readFileSync(0) : fs.readFileSync(inputPath);
   const buffer = new Uint8Array(ifcData);
 
   console.log(`Converting ${inputPath} (${(ifcData.length / 1024 / 1024).toFixed(1)} MB)...`);
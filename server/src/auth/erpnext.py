@@ -1,27 +1,70 @@
 import base64
+import functools
 import hashlib
+import os
 
 import httpx
 from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
+# Shared HTTP client so connection-test calls reuse keep-alive connections
+# instead of paying a TCP+TLS handshake per call.
+_client: httpx.AsyncClient | None = None
 
-def _derive_fernet_key(secret_key: str) -> bytes:
-    """Derive a Fernet-compatible key from the app secret_key."""
+
+async def _get_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it lazily on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=10.0,
+            verify=False,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared AsyncClient (called on application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+_NONCE_SIZE = 12
+
+
+@functools.lru_cache(maxsize=4)
+def _get_aesgcm(secret_key: str) -> AESGCM:
+    """Return an AESGCM instance for the app secret_key, derived once and cached."""
+    return AESGCM(hashlib.sha256(secret_key.encode()).digest())
+
+
+@functools.lru_cache(maxsize=4)
+def _get_fernet(secret_key: str) -> Fernet:
+    """Legacy Fernet instance, kept to decrypt secrets stored before AES-GCM."""
     key = hashlib.sha256(secret_key.encode()).digest()
-    return base64.urlsafe_b64encode(key)
+    return Fernet(base64.urlsafe_b64encode(key))
 
 
 def encrypt_secret(plain: str, secret_key: str) -> str:
-    """Encrypt a plaintext string using Fernet symmetric encryption."""
-    f = Fernet(_derive_fernet_key(secret_key))
-    return f.encrypt(plain.encode()).decode()
+    """Encrypt a plaintext string using AES-GCM."""
+    nonce = os.urandom(_NONCE_SIZE)
+    ct = _get_aesgcm(secret_key).encrypt(nonce, plain.encode(), None)
+    return base64.urlsafe_b64encode(nonce + ct).decode()
 
 
 def decrypt_secret(cipher: str, secret_key: str) -> str:
-    """Decrypt a Fernet-encrypted string."""
-    f = Fernet(_derive_fernet_key(secret_key))
+    """Decrypt a secret, falling back to legacy Fernet ciphertexts."""
+    try:
+        data = base64.urlsafe_b64decode(cipher.encode())
+        plain = _get_aesgcm(secret_key).decrypt(data[:_NONCE_SIZE], data[_NONCE_SIZE:], None)
+        return plain.decode()
+    except Exception:
+        pass
     try:
-        return f.decrypt(cipher.encode()).decode()
+        return _get_fernet(secret_key).decrypt(cipher.encode()).decode()
     except InvalidToken:
         return ""
 
@@ -30,17 +73,17 @@ async def test_erpnext_connection(url: str, api_key: str, api_secret: str) -> di
     """Test ERPNext connection by calling get_logged_user."""
     url = url.rstrip("/")
     try:
-        async with httpx.AsyncClient(timeout=10.0, verify=False) as client:
-            resp = await client.get(
-                f"{url}/api/method/frappe.auth.get_logged_user",
-                headers={
-                    "Authorization": f"token {api_key}:{api_secret}",
-                },
-            )
-            if resp.status_code == 200:
-                data = resp.json()
-                return {"success": True, "user": data.get("message", "")}
-            return {"success": False, "error": f"HTTP {resp.status_code}: {resp.text[:200]}"}
+        client = await _get_client()
+        resp = await client.get(
+            f"{url}/api/method/frappe.auth.get_logged_user",
+            headers={
+                "Authorization": f"token {api_key}:{api_secret}",
+            },
+        )
+        if resp.status_code == 200:
+            data = resp.json()
+            return {"success": True, "user": data.get("message", "")}
+        return {"success": False, "error": f"HTTP {resp.status_code}: {resp.text[:200]}"}
     except httpx.ConnectError:
         return {"success": False, "error": f"Cannot connect to {url}"}
     except Exception as e:
@@ -51,24 +94,24 @@ async def test_nextcloud_connection(url: str, username: str, password: str) -> d
     """Test Nextcloud connection by calling the OCS user endpoint."""
     url = url.rstrip("/")
     try:
-        async with httpx.AsyncClient(timeout=10.0, verify=False) as client:
-            resp = await client.get(
-                f"{url}/ocs/v1.php/cloud/user",
-                auth=(username, password),
-                headers={"OCS-APIRequest": "true", "Accept": "application/json"},
-            )
-            if resp.status_code == 200:
-                data = resp.json()
-                ocs = data.get("ocs", {})
-                meta = ocs.get("meta", {})
-                if meta.get("statuscode") == 100:
-                    user_data = ocs.get("data", {})
-                    return {
-                        "success": True,
-                        "user": user_data.get("display-name") or user_data.get("id", username),
-                    }
-                return {"success": False, "error": f"OCS error: {meta.get('message', 'Unknown')}"}
-            return {"success": False, "error": f"HTTP {resp.status_code}: {resp.text[:200]}"}
+        client = await _get_client()
+        resp = await client.get(
+            f"{url}/ocs/v1.php/cloud/user",
+            auth=(username, password),
+            headers={"OCS-APIRequest": "true", "Accept": "application/json"},
+        )
+        if resp.status_code == 200:
+            data = resp.json()
+            ocs = data.get("ocs", {})
+            meta = ocs.get("meta", {})
+            if meta.get("statuscode") == 100:
+                user_data = ocs.get("data", {})
+                return {
+                    "success": True,
+                    "user": user_data.get("display-name") or user_data.get("id", username),
+                }
+            return {"success": False, "error": f"OCS error: {meta.get('message', 'Unknown')}"}
+        return {"success": False, "error": f"HTTP {resp.status_code}: {resp.text[:200]}"}
     except httpx.ConnectError:
         return {"success": False, "error": f"Cannot connect to {url}"}
     except Exception as e:
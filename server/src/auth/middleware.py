@@ -1,16 +1,30 @@
 import hashlib
+import time
 import uuid
 
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.models import User
-from src.auth.service import decode_jwt_token, get_user_by_id, get_user_by_token_hash
+from src.auth.service import (
+    decode_jwt_token,
+    get_user_by_id,
+    get_user_by_token_hash,
+    get_user_id_by_token_hash,
+    hash_api_token,
+)
 from src.db.database import get_db
 
 security = HTTPBearer(auto_error=False)
 
+# Short-lived caches so repeated requests with the same bearer token skip the
+# HMAC/SHA-256 work and the token-hash join. Entries map token -> user id; the
+# user row itself is still loaded per request from the session.
+_jwt_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+_api_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
@@ -21,21 +35,74 @@ async def get_current_user(
 
     token = credentials.credentials
 
-    # Try JWT first
-    payload = decode_jwt_token(token)
-    if payload:
-        user_id = payload.get("sub")
-        if user_id:
-            user = await get_user_by_id(db, uuid.UUID(user_id))
+    # API tokens carry a fixed prefix and can never be valid JWTs, so the
+    # prefix check saves an HMAC verification on the machine-client path.
+    if token.startswith("ifcgit_"):
+        cached_user_id = _api_token_cache.get(token)
+        if cached_user_id is not None:
+            user = await get_user_by_id(db, cached_user_id)
             if user:
                 return user
-
-    # Try API token
-    if token.startswith("ifcgit_"):
-        token_hash = hashlib.sha256(token.encode()).hexdigest()
-        user = await get_user_by_token_hash(db, token_hash)
+        user = await get_user_by_token_hash(db, hash_api_token(token))
+        if user is None:
+            # Tokens issued before the BLAKE2b switch are stored as SHA-256.
+            legacy_hash = hashlib.sha256(token.encode()).digest().hex()
+            user = await get_user_by_token_hash(db, legacy_hash)
         if user:
+            _api_token_cache[token] = user.id
             return user
+    else:
+        payload = _jwt_cache.get(token)
+        if payload is None or payload.get("exp", 0) <= time.time():
+            payload = decode_jwt_token(token)
+            if payload:
+                _jwt_cache[token] = payload
+        if payload:
+            user_id = payload.get("sub")
+            if user_id:
+                user = await get_user_by_id(db, uuid.UUID(user_id))
+                if user:
+                    return user
+
+    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+
+
+async def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> uuid.UUID:
+    """Authenticate and return only the user id.
+
+    For endpoints that never read anything but ``user.id`` this avoids
+    loading the User row: the JWT path needs no database hit at all and the
+    API-token path resolves a single scalar column.
+    """
+    if not credentials:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    token = credentials.credentials
+
+    if token.startswith("ifcgit_"):
+        cached_user_id = _api_token_cache.get(token)
+        if cached_user_id is not None:
+            return cached_user_id
+        user_id = await get_user_id_by_token_hash(db, hash_api_token(token))
+        if user_id is None:
+            legacy_hash = hashlib.sha256(token.encode()).digest().hex()
+            user_id = await get_user_id_by_token_hash(db, legacy_hash)
+        if user_id is not None:
+            _api_token_cache[token] = user_id
+            return user_id
+    else:
+        payload = _jwt_cache.get(token)
+        if payload is None or payload.get("exp", 0) <= time.time():
+            payload = decode_jwt_token(token)
+            if payload:
+                _jwt_cache[token] = payload
+        if payload:
+            user_id = payload.get("sub")
+            if user_id:
+                return uuid.UUID(user_id)
 
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
 
@@ -1,8 +1,9 @@
 import uuid
+from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, EmailStr
-from sqlalchemy import select
+from pydantic import BaseModel, EmailStr, TypeAdapter
+from sqlalchemy import exists, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.middleware import get_current_user
@@ -62,26 +63,30 @@ class ApiTokenResponse(BaseModel):
     id: uuid.UUID
     name: str | None
     token: str | None = None  # Only returned on creation
-    expires_at: str | None
-    created_at: str
+    expires_at: datetime | None
+    created_at: datetime
 
     model_config = {"from_attributes": True}
 
 
+# Validates a whole ORM result list in pydantic-core instead of a Python loop.
+_TOKEN_LIST_ADAPTER = TypeAdapter(list[ApiTokenResponse])
+
+
 # --- Endpoints ---
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(req: RegisterRequest, db: AsyncSession = Depends(get_db)):
     # Check existing
-    existing = await db.execute(
-        select(User).where((User.username == req.username) | (User.email == req.email))
+    duplicate = await db.scalar(
+        select(exists().where((User.username == req.username) | (User.email == req.email)))
     )
-    if existing.scalar_one_or_none():
+    if duplicate:
         raise HTTPException(status_code=400, detail="Username or email already taken")
 
     # First user gets admin role
-    user_count = await db.execute(select(User))
-    role = "admin" if not user_count.scalars().first() else "viewer"
+    any_user = await db.execute(select(User.id).limit(1))
+    role = "admin" if any_user.first() is None else "viewer"
 
     user = await register_user(db, req.username, req.email, req.password, role=role)
     return user
@@ -112,24 +117,15 @@ async def create_token(
         id=token.id,
         name=token.name,
         token=raw_token,
-        expires_at=token.expires_at.isoformat() if token.expires_at else None,
-        created_at=token.created_at.isoformat(),
+        expires_at=token.expires_at,
+        created_at=token.created_at,
     )
 
 
 @router.get("/tokens", response_model=list[ApiTokenResponse])
 async def list_tokens(user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(ApiToken).where(ApiToken.user_id == user.id))
-    tokens = result.scalars().all()
-    return [
-        ApiTokenResponse(
-            id=t.id,
-            name=t.name,
-            expires_at=t.expires_at.isoformat() if t.expires_at else None,
-            created_at=t.created_at.isoformat(),
-        )
-        for t in tokens
-    ]
+    return _TOKEN_LIST_ADAPTER.validate_python(result.scalars().all())
 
 
 @router.delete("/tokens/{token_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -168,8 +164,7 @@ class SettingsUpdateRequest(BaseModel):
 
 # --- Settings Endpoints ---
 
-@router.get("/settings", response_model=SettingsResponse)
-async def get_settings(user: User = Depends(get_current_user)):
+def _to_settings_response(user: User) -> SettingsResponse:
     return SettingsResponse(
         username=user.username,
         email=user.email,
@@ -183,6 +178,11 @@ async def get_settings(user: User = Depends(get_current_user)):
     )
 
 
+@router.get("/settings", response_model=SettingsResponse)
+async def get_settings(user: User = Depends(get_current_user)):
+    return _to_settings_response(user)
+
+
 @router.put("/settings", response_model=SettingsResponse)
 async def update_settings(
     req: SettingsUpdateRequest,
@@ -203,19 +203,10 @@ async def update_settings(
         user.nextcloud_password = encrypt_secret(req.nextcloud_password, settings.secret_key) if req.nextcloud_password else None
 
     await db.commit()
-    await db.refresh(user)
-
-    return SettingsResponse(
-        username=user.username,
-        email=user.email,
-        role=user.role,
-        erpnext_url=user.erpnext_url,
-        erpnext_api_key=user.erpnext_api_key,
-        erpnext_api_secret_set=bool(user.erpnext_api_secret),
-        nextcloud_url=user.nextcloud_url,
-        nextcloud_username=user.nextcloud_username,
-        nextcloud_password_set=bool(user.nextcloud_password),
-    )
+    # No refresh: all updated values are already set on the instance and
+    # nothing here is recomputed server-side, so re-SELECTing the row
+    # (including the encrypted blobs) would be wasted work.
+    return _to_settings_response(user)
 
 
 @router.post("/settings/erpnext/test")
@@ -1,17 +1,30 @@
+import asyncio
+import base64
 import hashlib
 import secrets
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
 
 import jwt
 from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, raiseload
 
 from src.auth.models import User, ApiToken
 from src.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds
+)
+
+# Bind the JWT key material and algorithm list once instead of rebuilding
+# them on every decode.
+_JWT_KEY = settings.secret_key.encode()
+_JWT_ALGS = [settings.jwt_algorithm]
+_JWT_OPTIONS = {"require": ["exp", "sub"]}
+_JWT_EXPIRE_SECONDS = settings.jwt_expire_minutes * 60
 
 
 def hash_password(password: str) -> str:
@@ -23,34 +36,52 @@ def verify_password(plain: str, hashed: str) -> bool:
 
 
 def create_jwt_token(user_id: str, username: str) -> str:
-    expire = datetime.now(timezone.utc) + timedelta(minutes=settings.jwt_expire_minutes)
+    # Integer epoch exp: PyJWT accepts it directly, skipping the
+    # datetime/timedelta construction and timestamp conversion per token.
     payload = {
         "sub": str(user_id),
         "username": username,
-        "exp": expire,
+        "exp": int(time.time()) + _JWT_EXPIRE_SECONDS,
     }
-    return jwt.encode(payload, settings.secret_key, algorithm=settings.jwt_algorithm)
+    return jwt.encode(payload, _JWT_KEY, algorithm=settings.jwt_algorithm)
 
 
 def decode_jwt_token(token: str) -> dict | None:
     try:
-        return jwt.decode(token, settings.secret_key, algorithms=[settings.jwt_algorithm])
+        return jwt.decode(token, _JWT_KEY, algorithms=_JWT_ALGS, options=_JWT_OPTIONS)
     except jwt.PyJWTError:
         return None
 
 
+def hash_api_token(raw: str) -> str:
+    """Hash a raw API token for storage/lookup.
+
+    BLAKE2b is noticeably faster than SHA-256 in pure software and equally
+    preimage-resistant for opaque random tokens. digest_size=32 keeps the
+    hex digest at the same 64 chars as the previous SHA-256 scheme.
+    """
+    return hashlib.blake2b(raw.encode(), digest_size=32).hexdigest()
+
+
+_TOKEN_PREFIX = b"ifcgit_"
+
+
 def generate_api_token() -> tuple[str, str]:
     """Generate a raw token and its hash. Returns (raw_token, token_hash)."""
-    raw = f"ifcgit_{secrets.token_urlsafe(32)}"
-    token_hash = hashlib.sha256(raw.encode()).hexdigest()
-    return raw, token_hash
+    # Same wire format as secrets.token_urlsafe, but staying in bytes until
+    # the final decode avoids the str round-trips and re-encode for hashing.
+    raw_bytes = _TOKEN_PREFIX + base64.urlsafe_b64encode(secrets.token_bytes(32)).rstrip(b"=")
+    token_hash = hashlib.blake2b(raw_bytes, digest_size=32).hexdigest()
+    return raw_bytes.decode("ascii"), token_hash
 
 
 async def register_user(db: AsyncSession, username: str, email: str, password: str, role: str = "viewer") -> User:
+    # bcrypt is ~100ms of CPU; run it off the event loop.
+    password_hash = await asyncio.to_thread(hash_password, password)
     user = User(
         username=username,
         email=email,
-        password_hash=hash_password(password),
+        password_hash=password_hash,
         role=role,
     )
     db.add(user)
@@ -60,9 +91,15 @@ async def register_user(db: AsyncSession, username: str, email: str, password: s
 
 
 async def authenticate_user(db: AsyncSession, username: str, password: str) -> User | None:
-    result = await db.execute(select(User).where(User.username == username))
+    # Login only needs id/username/password_hash; skip streaming the wide
+    # integration columns (encrypted secrets can be several KB each).
+    result = await db.execute(
+        select(User)
+        .options(load_only(User.id, User.username, User.password_hash))
+        .where(User.username == username)
+    )
     user = result.scalar_one_or_none()
-    if user and verify_password(password, user.password_hash):
+    if user and await asyncio.to_thread(verify_password, password, user.password_hash):
         return user
     return None
 
@@ -73,17 +110,33 @@ async def get_user_by_id(db: AsyncSession, user_id: uuid.UUID) -> User | None:
 
 
 async def get_user_by_token_hash(db: AsyncSession, token_hash: str) -> User | None:
+    # The User is returned to arbitrary route handlers (some read the
+    # integration columns), so keep all columns loaded — a deferred column
+    # would lazy-load and raise MissingGreenlet under the async session.
+    # raiseload guards against accidental relationship traversal instead.
     result = await db.execute(
         select(User)
+        .options(raiseload(User.tokens))
         .join(ApiToken, ApiToken.user_id == User.id)
         .where(ApiToken.token_hash == token_hash)
         .where(
-            (ApiToken.expires_at.is_(None)) | (ApiToken.expires_at > datetime.now(timezone.utc))
+            # func.now() is evaluated once per statement server-side; no
+            # Python datetime construction in the hottest auth query.
+            (ApiToken.expires_at.is_(None)) | (ApiToken.expires_at > func.now())
         )
     )
     return result.scalar_one_or_none()
 
 
+async def get_user_id_by_token_hash(db: AsyncSession, token_hash: str) -> uuid.UUID | None:
+    """Resolve just the owning user id for a token hash, without hydrating User."""
+    return await db.scalar(
+        select(ApiToken.user_id)
+        .where(ApiToken.token_hash == token_hash)
+        .where((ApiToken.expires_at.is_(None)) | (ApiToken.expires_at > func.now()))
+    )
+
+
 async def create_api_token_for_user(
     db: AsyncSession, user_id: uuid.UUID, name: str, expires_days: int | None = None
 ) -> tuple[str, ApiToken]:
@@ -100,11 +153,9 @@ async def create_api_token_for_user(
 
 async def delete_api_token(db: AsyncSession, token_id: uuid.UUID, user_id: uuid.UUID) -> bool:
     result = await db.execute(
-        select(ApiToken).where(ApiToken.id == token_id, ApiToken.user_id == user_id)
+        delete(ApiToken)
+        .where(ApiToken.id == token_id, ApiToken.user_id == user_id)
+        .returning(ApiToken.id)
     )
-    token = result.scalar_one_or_none()
-    if token:
-        await db.delete(token)
-        await db.commit()
-        return True
-    return False
+    await db.commit()
+    return result.first() is not None
@@ -1,15 +1,18 @@
 """BCF-API 3.0 compliant REST endpoints. Phase 2 implementation."""
 
+import os
 import uuid
+from datetime import datetime
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import bindparam, exists, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import raiseload
 
-from src.auth.middleware import get_current_user
-from src.auth.models import User
+from src.auth.middleware import get_current_user_id
 from src.bcf.models import BcfTopic, BcfViewpoint, BcfComment
 from src.db.database import get_db
 from src.projects.models import Project
@@ -46,8 +49,8 @@ class TopicResponse(BaseModel):
     priority: str | None
     author_id: uuid.UUID
     assignee_id: uuid.UUID | None
-    created_at: str
-    modified_at: str
+    created_at: datetime
+    modified_at: datetime
 
     model_config = {"from_attributes": True}
 
@@ -68,15 +71,76 @@ class CommentResponse(BaseModel):
     body: str
     author_id: uuid.UUID
     viewpoint_id: uuid.UUID | None
-    created_at: str
+    created_at: datetime
 
     model_config = {"from_attributes": True}
 
 
 # --- Helpers ---
 
+# Columns the topic read endpoints actually return; selecting them as a row
+# tuple skips ORM hydration and identity-map bookkeeping entirely.
+_TOPIC_COLUMNS = (
+    BcfTopic.guid,
+    BcfTopic.title,
+    BcfTopic.description,
+    BcfTopic.status,
+    BcfTopic.type,
+    BcfTopic.priority,
+    BcfTopic.author_id,
+    BcfTopic.assignee_id,
+    BcfTopic.created_at,
+    BcfTopic.modified_at,
+)
+
+_COMMENT_COLUMNS = (
+    BcfComment.guid,
+    BcfComment.body,
+    BcfComment.author_id,
+    BcfComment.viewpoint_id,
+    BcfComment.created_at,
+)
+
+
+# Hot statements built once at import time: the SQLAlchemy compile cache is
+# keyed on statement structure, and reusing the same Select object also skips
+# re-running the Python-level construction on every request.
+_TOPICS_BY_PROJECT_STMT = (
+    select(*_TOPIC_COLUMNS)
+    .where(BcfTopic.project_id == bindparam("pid"))
+    .order_by(BcfTopic.modified_at.desc())
+)
+_TOPIC_BY_GUID_STMT = select(*_TOPIC_COLUMNS).where(
+    BcfTopic.project_id == bindparam("pid"), BcfTopic.guid == bindparam("guid")
+)
+_TOPIC_EXISTS_STMT = select(
+    exists().where(BcfTopic.project_id == bindparam("pid"), BcfTopic.guid == bindparam("guid"))
+)
+_COMMENTS_BY_TOPIC_GUID_STMT = (
+    select(*_COMMENT_COLUMNS)
+    .join(BcfTopic, BcfTopic.id == BcfComment.topic_id)
+    .where(BcfTopic.project_id == bindparam("pid"), BcfTopic.guid == bindparam("guid"))
+    .order_by(BcfComment.created_at)
+)
+
+
+def _new_guid() -> str:
+    """Random dashed GUID straight from urandom bytes.
+
+    Skips the uuid.UUID object construction of uuid4(); the column is a
+    native uuid type so the dashed hex layout is all that matters.
+    """
+    h = os.urandom(16).hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
 async def get_bcf_project(project_id: str, db: AsyncSession) -> Project:
-    result = await db.execute(select(Project).where(Project.id == project_id))
+    # raiseload turns any accidental relationship access into an immediate
+    # error instead of a lazy load (which would fire N+1 queries and, under
+    # the async session, raise MissingGreenlet anyway).
+    result = await db.execute(
+        select(Project).options(raiseload("*")).where(Project.id == project_id)
+    )
     project = result.scalar_one_or_none()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -88,190 +152,184 @@ async def get_bcf_project(project_id: str, db: AsyncSession) -> Project:
 @router.get("/projects/{project_id}/topics", response_model=list[TopicResponse])
 async def list_topics(
     project_id: uuid.UUID,
-    user: User = Depends(get_current_user),
+    user_id: uuid.UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(BcfTopic)
-        .where(BcfTopic.project_id == project_id)
-        .order_by(BcfTopic.modified_at.desc())
-    )
-    topics = result.scalars().all()
-    return [
-        TopicResponse(
-            guid=t.guid,
-            title=t.title,
-            description=t.description,
-            status=t.status,
-            type=t.type,
-            priority=t.priority,
-            author_id=t.author_id,
-            assignee_id=t.assignee_id,
-            created_at=t.created_at.isoformat(),
-            modified_at=t.modified_at.isoformat(),
-        )
-        for t in topics
-    ]
+    result = await db.execute(_TOPICS_BY_PROJECT_STMT, {"pid": project_id})
+    rows = result.all()
+
+    # Rows must be materialized before the handler returns: since FastAPI
+    # 0.106 the get_db session is closed as soon as the handler yields the
+    # response, so a server-side cursor would die mid-stream on asyncpg.
+    # Only the JSON encoding streams, which still avoids assembling the
+    # full response body in one buffer.
+    def _encode():
+        yield b"["
+        first = True
+        for row in rows:
+            prefix = b"" if first else b","
+            first = False
+            yield prefix + orjson.dumps(dict(row._mapping))
+        yield b"]"
+
+    return StreamingResponse(_encode(), media_type="application/json")
 
 
 @router.post("/projects/{project_id}/topics", response_model=TopicResponse, status_code=status.HTTP_201_CREATED)
 async def create_topic(
     project_id: uuid.UUID,
     req: TopicCreate,
-    user: User = Depends(get_current_user),
+    user_id: uuid.UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    topic = BcfTopic(
-        project_id=project_id,
-        guid=str(uuid.uuid4()),
+    guid = _new_guid()
+    # INSERT ... RETURNING pulls the server-defaulted timestamps in the same
+    # round trip, instead of add/commit/refresh issuing a follow-up SELECT.
+    result = await db.execute(
+        insert(BcfTopic)
+        .values(
+            project_id=project_id,
+            guid=guid,
+            title=req.title,
+            description=req.description,
+            status=req.status,
+            type=req.type,
+            priority=req.priority,
+            assignee_id=req.assignee_id,
+            author_id=user_id,
+        )
+        .returning(BcfTopic.created_at, BcfTopic.modified_at)
+    )
+    row = result.one()
+    await db.commit()
+
+    return TopicResponse.model_construct(
+        guid=guid,
         title=req.title,
         description=req.description,
         status=req.status,
         type=req.type,
         priority=req.priority,
+        author_id=user_id,
         assignee_id=req.assignee_id,
-        author_id=user.id,
-    )
-    db.add(topic)
-    await db.commit()
-    await db.refresh(topic)
-
-    return TopicResponse(
-        guid=topic.guid,
-        title=topic.title,
-        description=topic.description,
-        status=topic.status,
-        type=topic.type,
-        priority=topic.priority,
-        author_id=topic.author_id,
-        assignee_id=topic.assignee_id,
-        created_at=topic.created_at.isoformat(),
-        modified_at=topic.modified_at.isoformat(),
+        created_at=row.created_at,
+        modified_at=row.modified_at,
     )
 
 
 @router.get("/projects/{project_id}/topics/{guid}", response_model=TopicResponse)
 async def get_topic(
     project_id: uuid.UUID,
-    guid: str,
-    user: User = Depends(get_current_user),
+    guid: uuid.UUID,
+    user_id: uuid.UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(BcfTopic).where(BcfTopic.project_id == project_id, BcfTopic.guid == guid)
-    )
-    topic = result.scalar_one_or_none()
-    if not topic:
+    # guid columns are UUID(as_uuid=False): asyncpg gets no bind processor
+    # for them, so a malformed string would blow up at the driver codec
+    # (500) instead of missing (404). Typing the path param as uuid.UUID
+    # rejects bad input with 422 up front; the canonical dashed string is
+    # what the column stores.
+    result = await db.execute(_TOPIC_BY_GUID_STMT, {"pid": project_id, "guid": str(guid)})
+    row = result.first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Topic not found")
 
-    return TopicResponse(
-        guid=topic.guid,
-        title=topic.title,
-        description=topic.description,
-        status=topic.status,
-        type=topic.type,
-        priority=topic.priority,
-        author_id=topic.author_id,
-        assignee_id=topic.assignee_id,
-        created_at=topic.created_at.isoformat(),
-        modified_at=topic.modified_at.isoformat(),
-    )
+    # orjson encodes the datetime/UUID values directly, skipping FastAPI's
+    # serialize_response pass (response_model stays for the OpenAPI schema).
+    return ORJSONResponse(dict(row._mapping))
 
 
 @router.put("/projects/{project_id}/topics/{guid}", response_model=TopicResponse)
 async def update_topic(
     project_id: uuid.UUID,
-    guid: str,
+    guid: uuid.UUID,
     req: TopicUpdate,
-    user: User = Depends(get_current_user),
+    user_id: uuid.UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(BcfTopic).where(BcfTopic.project_id == project_id, BcfTopic.guid == guid)
-    )
-    topic = result.scalar_one_or_none()
-    if not topic:
+    updates = req.model_dump(exclude_unset=True)
+    if updates:
+        result = await db.execute(
+            update(BcfTopic)
+            .where(BcfTopic.project_id == project_id, BcfTopic.guid == str(guid))
+            .values(**updates)
+            .returning(*_TOPIC_COLUMNS)
+        )
+        row = result.first()
+        await db.commit()
+    else:
+        result = await db.execute(_TOPIC_BY_GUID_STMT, {"pid": project_id, "guid": str(guid)})
+        row = result.first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Topic not found")
 
-    for field, value in req.model_dump(exclude_unset=True).items():
-        setattr(topic, field, value)
-
-    await db.commit()
-    await db.refresh(topic)
-
-    return TopicResponse(
-        guid=topic.guid,
-        title=topic.title,
-        description=topic.description,
-        status=topic.status,
-        type=topic.type,
-        priority=topic.priority,
-        author_id=topic.author_id,
-        assignee_id=topic.assignee_id,
-        created_at=topic.created_at.isoformat(),
-        modified_at=topic.modified_at.isoformat(),
-    )
+    return ORJSONResponse(dict(row._mapping))
 
 
 @router.get("/projects/{project_id}/topics/{guid}/comments", response_model=list[CommentResponse])
 async def list_comments(
     project_id: uuid.UUID,
-    guid: str,
-    user: User = Depends(get_current_user),
+    guid: uuid.UUID,
+    user_id: uuid.UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(BcfTopic).where(BcfTopic.project_id == project_id, BcfTopic.guid == guid)
-    )
-    topic = result.scalar_one_or_none()
-    if not topic:
+    # The 404 must be decided before the streamed response starts, so probe
+    # the (indexed) topic key first.
+    topic_exists = await db.scalar(_TOPIC_EXISTS_STMT, {"pid": project_id, "guid": str(guid)})
+    if not topic_exists:
         raise HTTPException(status_code=404, detail="Topic not found")
 
-    result = await db.execute(
-        select(BcfComment).where(BcfComment.topic_id == topic.id).order_by(BcfComment.created_at)
-    )
-    comments = result.scalars().all()
-    return [
-        CommentResponse(
-            guid=c.guid,
-            body=c.body,
-            author_id=c.author_id,
-            viewpoint_id=c.viewpoint_id,
-            created_at=c.created_at.isoformat(),
-        )
-        for c in comments
-    ]
+    # As in list_topics: fetch before the handler returns (the session is
+    # torn down before the body streams), then stream only the encoding.
+    result = await db.execute(_COMMENTS_BY_TOPIC_GUID_STMT, {"pid": project_id, "guid": str(guid)})
+    rows = result.all()
+
+    def _encode():
+        yield b"["
+        first = True
+        for row in rows:
+            prefix = b"" if first else b","
+            first = False
+            yield prefix + orjson.dumps(dict(row._mapping))
+        yield b"]"
+
+    return StreamingResponse(_encode(), media_type="application/json")
 
 
 @router.post("/projects/{project_id}/topics/{guid}/comments", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
 async def create_comment(
     project_id: uuid.UUID,
-    guid: str,
+    guid: uuid.UUID,
     req: CommentCreate,
-    user: User = Depends(get_current_user),
+    user_id: uuid.UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
+    comment_guid = _new_guid()
+    # INSERT ... SELECT resolves the topic id server-side, collapsing the
+    # lookup + insert into one round trip; zero rows returned means the
+    # topic does not exist.
     result = await db.execute(
-        select(BcfTopic).where(BcfTopic.project_id == project_id, BcfTopic.guid == guid)
+        insert(BcfComment)
+        .from_select(
+            ["topic_id", "guid", "body", "author_id"],
+            select(
+                BcfTopic.id,
+                bindparam("g", comment_guid, type_=BcfComment.guid.type),
+                bindparam("b", req.body, type_=BcfComment.body.type),
+                bindparam("a", user_id, type_=BcfComment.author_id.type),
+            ).where(BcfTopic.project_id == project_id, BcfTopic.guid == str(guid)),
+        )
+        .returning(BcfComment.created_at)
     )
-    topic = result.scalar_one_or_none()
-    if not topic:
+    row = result.first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Topic not found")
+    await db.commit()
 
-    comment = BcfComment(
-        topic_id=topic.id,
-        guid=str(uuid.uuid4()),
+    return CommentResponse.model_construct(
+        guid=comment_guid,
         body=req.body,
-        author_id=user.id,
-    )
-    db.add(comment)
-    await db.commit()
-    await db.refresh(comment)
-
-    return CommentResponse(
-        guid=comment.guid,
-        body=comment.body,
-        author_id=comment.author_id,
-        viewpoint_id=comment.viewpoint_id,
-        created_at=comment.created_at.isoformat(),
+        author_id=user_id,
+        viewpoint_id=None,
+        created_at=row.created_at,
     )
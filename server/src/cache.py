@@ -0,0 +1,36 @@
+"""Redis-backed cache for read-mostly endpoint payloads.
+
+Keys should embed a content fingerprint (branch tip oid, tree oid) so
+stale entries simply expire instead of needing explicit invalidation.
+Values are stored as JSON; a missing or unreachable Redis degrades to
+calling the producer directly.
+"""
+import logging
+from typing import Awaitable, Callable
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+async def get_or_set(key: str, ttl: int, producer: Callable[[], Awaitable]):
+    """Return the cached value for key, or produce, store and return it."""
+    redis = None
+    try:
+        from src.workers.queue import get_redis_pool
+        redis = await get_redis_pool()
+        cached = await redis.get(key)
+        if cached is not None:
+            return orjson.loads(cached)
+    except Exception as e:
+        logger.debug(f"Cache read skipped for {key}: {e}")
+        redis = None
+
+    value = await producer()
+
+    if redis is not None:
+        try:
+            await redis.set(key, orjson.dumps(value), ex=ttl)
+        except Exception as e:
+            logger.debug(f"Cache write skipped for {key}: {e}")
+    return value
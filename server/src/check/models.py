@@ -2,10 +2,11 @@ import uuid
 from datetime import datetime
 
 from sqlalchemy import String, Integer, DateTime, ForeignKey, func
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.db.database import Base
+from src.db.types import RawJSON
 
 
 class ValidationRun(Base):
@@ -19,5 +20,5 @@ class ValidationRun(Base):
     total_requirements: Mapped[int | None] = mapped_column(Integer, nullable=True)
     passed: Mapped[int | None] = mapped_column(Integer, nullable=True)
     failed: Mapped[int | None] = mapped_column(Integer, nullable=True)
-    results_json: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    results_json: Mapped[bytes | None] = mapped_column(RawJSON, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
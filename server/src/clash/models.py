@@ -2,10 +2,11 @@ import uuid
 from datetime import datetime
 
 from sqlalchemy import String, Integer, Float, DateTime, ForeignKey, func
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.db.database import Base
+from src.db.types import RawJSON
 
 
 class ClashSet(Base):
@@ -17,7 +18,8 @@ class ClashSet(Base):
     model_a_path: Mapped[str | None] = mapped_column(String(500), nullable=True)
     model_b_path: Mapped[str | None] = mapped_column(String(500), nullable=True)
     tolerance: Mapped[float] = mapped_column(Float, default=0.01)
-    filters_json: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # Round-tripped to the client as-is; raw bytes skip the JSONB codec.
+    filters_json: Mapped[bytes | None] = mapped_column(RawJSON, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -28,6 +30,6 @@ class ClashResult(Base):
     clash_set_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("clash_sets.id"), nullable=False)
     commit_hash: Mapped[str | None] = mapped_column(String(40), nullable=True)
     total_clashes: Mapped[int | None] = mapped_column(Integer, nullable=True)
-    results_json: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    results_json: Mapped[bytes | None] = mapped_column(RawJSON, nullable=True)
     status: Mapped[str] = mapped_column(String(50), default="new")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
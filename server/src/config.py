@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from functools import cached_property
 from typing import List
 import json
 
@@ -8,9 +9,14 @@ class Settings(BaseSettings):
     secret_key: str = "dev-secret-key-change-in-production"
     jwt_algorithm: str = "HS256"
     jwt_expire_minutes: int = 1440  # 24 hours
+    bcrypt_rounds: int = 12  # lower (e.g. 4) for dev/test environments
 
     # Database
     database_url: str = "postgresql+asyncpg://ifcgit:ifcgit@db:5432/ifcgit"
+    db_pool_size: int = 20
+    db_max_overflow: int = 10
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800  # seconds
 
     # Redis
     redis_url: str = "redis://redis:6379/0"
@@ -18,15 +24,15 @@ class Settings(BaseSettings):
     # Storage paths
     data_dir: str = "/data"
 
-    @property
+    @cached_property
     def repos_dir(self) -> str:
         return f"{self.data_dir}/repos"
 
-    @property
+    @cached_property
     def cache_dir(self) -> str:
         return f"{self.data_dir}/cache"
 
-    @property
+    @cached_property
     def working_dir(self) -> str:
         return f"{self.data_dir}/working"
 
@@ -40,7 +46,7 @@ class Settings(BaseSettings):
     log_level: str = "info"
     cors_origins: str = '["http://localhost:3000"]'
 
-    @property
+    @cached_property
     def cors_origins_list(self) -> List[str]:
         return json.loads(self.cors_origins)
 
@@ -53,6 +59,10 @@ class Settings(BaseSettings):
     neo4j_uri: str = "bolt://neo4j:7687"
     neo4j_user: str = "neo4j"
     neo4j_password: str = "neo4j-ifcgit"
+    # Neo4j's import directory, if it is mounted into this container.
+    # When set, cold graph imports stage CSV files there and load them
+    # with LOAD CSV instead of transactional UNWIND batches.
+    neo4j_import_dir: str = ""
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
@@ -0,0 +1,31 @@
+"""Add indexes for token and user lookups
+
+Revision ID: 003_auth_indexes
+Revises: 002_project_engine
+Create Date: 2026-08-30
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "003_auth_indexes"
+down_revision: Union[str, None] = "002_project_engine"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column("api_tokens", "token_hash", type_=sa.String(64), existing_nullable=False)
+    op.create_index("ix_api_tokens_token_hash", "api_tokens", ["token_hash"], unique=True)
+    op.create_index("ix_api_tokens_hash_expires", "api_tokens", ["token_hash", "expires_at"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_username", table_name="users")
+    op.drop_index("ix_api_tokens_hash_expires", table_name="api_tokens")
+    op.drop_index("ix_api_tokens_token_hash", table_name="api_tokens")
+    op.alter_column("api_tokens", "token_hash", type_=sa.String(255), existing_nullable=False)
@@ -0,0 +1,40 @@
+"""Store BCF guid columns as native UUID
+
+Revision ID: 004_bcf_guid_uuid
+Revises: 003_auth_indexes
+Create Date: 2026-08-30
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "004_bcf_guid_uuid"
+down_revision: Union[str, None] = "003_auth_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TABLES = ("bcf_topics", "bcf_viewpoints", "bcf_comments")
+
+
+def upgrade() -> None:
+    for table in _TABLES:
+        op.alter_column(
+            table,
+            "guid",
+            type_=postgresql.UUID(),
+            postgresql_using="guid::uuid",
+            existing_nullable=False,
+        )
+
+
+def downgrade() -> None:
+    for table in _TABLES:
+        op.alter_column(
+            table,
+            "guid",
+            type_=sa.String(36),
+            postgresql_using="guid::text",
+            existing_nullable=False,
+        )
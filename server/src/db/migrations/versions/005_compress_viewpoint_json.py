@@ -0,0 +1,75 @@
+"""Store BCF viewpoint JSON payloads as compressed bytes
+
+Revision ID: 005_viewpoint_blobs
+Revises: 004_bcf_guid_uuid
+Create Date: 2026-08-30
+"""
+import json
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "005_viewpoint_blobs"
+down_revision: Union[str, None] = "004_bcf_guid_uuid"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = ("camera_json", "components_json", "clipping_planes_json")
+
+
+def upgrade() -> None:
+    for col in _COLUMNS:
+        op.add_column("bcf_viewpoints", sa.Column(f"{col}_blob", sa.LargeBinary(), nullable=True))
+
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.text(f"SELECT id, {', '.join(_COLUMNS)} FROM bcf_viewpoints")
+    ).mappings()
+    for row in rows:
+        updates = {
+            f"{col}_blob": zlib.compress(
+                json.dumps(row[col], separators=(",", ":")).encode(), 3
+            )
+            for col in _COLUMNS
+            if row[col] is not None
+        }
+        if updates:
+            assignments = ", ".join(f"{name} = :{name}" for name in updates)
+            conn.execute(
+                sa.text(f"UPDATE bcf_viewpoints SET {assignments} WHERE id = :id"),
+                {**updates, "id": row["id"]},
+            )
+
+    for col in _COLUMNS:
+        op.drop_column("bcf_viewpoints", col)
+        op.alter_column("bcf_viewpoints", f"{col}_blob", new_column_name=col)
+
+
+def downgrade() -> None:
+    from sqlalchemy.dialects.postgresql import JSONB
+
+    for col in _COLUMNS:
+        op.add_column("bcf_viewpoints", sa.Column(f"{col}_json", JSONB(), nullable=True))
+
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.text(f"SELECT id, {', '.join(_COLUMNS)} FROM bcf_viewpoints")
+    ).mappings()
+    for row in rows:
+        updates = {
+            f"{col}_json": json.loads(zlib.decompress(row[col]))
+            for col in _COLUMNS
+            if row[col] is not None
+        }
+        if updates:
+            assignments = ", ".join(f"{name} = :{name}" for name in updates)
+            conn.execute(
+                sa.text(f"UPDATE bcf_viewpoints SET {assignments} WHERE id = :id"),
+                {**{k: json.dumps(v) for k, v in updates.items()}, "id": row["id"]},
+            )
+
+    for col in _COLUMNS:
+        op.drop_column("bcf_viewpoints", col)
+        op.alter_column("bcf_viewpoints", f"{col}_json", new_column_name=col)
@@ -0,0 +1,32 @@
+"""Add composite indexes for BCF access patterns
+
+Revision ID: 006_bcf_indexes
+Revises: 005_viewpoint_blobs
+Create Date: 2026-08-30
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "006_bcf_indexes"
+down_revision: Union[str, None] = "005_viewpoint_blobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_bcf_topics_project_guid", "bcf_topics", ["project_id", "guid"], unique=True
+    )
+    op.create_index(
+        "ix_bcf_topics_project_modified", "bcf_topics", ["project_id", "modified_at"]
+    )
+    op.create_index(
+        "ix_bcf_comments_topic_created", "bcf_comments", ["topic_id", "created_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bcf_comments_topic_created", table_name="bcf_comments")
+    op.drop_index("ix_bcf_topics_project_modified", table_name="bcf_topics")
+    op.drop_index("ix_bcf_topics_project_guid", table_name="bcf_topics")
@@ -0,0 +1,41 @@
+"""Store clash/validation result blobs as raw JSON bytes
+
+Revision ID: 007_raw_json_blobs
+Revises: 006_bcf_indexes
+Create Date: 2026-08-30
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "007_raw_json_blobs"
+down_revision: Union[str, None] = "006_bcf_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = (
+    ("clash_sets", "filters_json"),
+    ("clash_results", "results_json"),
+    ("validation_runs", "results_json"),
+)
+
+
+def upgrade() -> None:
+    for table, column in _COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.LargeBinary(),
+            postgresql_using=f"convert_to({column}::text, 'UTF8')",
+        )
+
+
+def downgrade() -> None:
+    for table, column in reversed(_COLUMNS):
+        op.alter_column(
+            table,
+            column,
+            type_=sa.dialects.postgresql.JSONB(),
+            postgresql_using=f"convert_from({column}, 'UTF8')::jsonb",
+        )
@@ -0,0 +1,53 @@
+"""Custom SQLAlchemy column types."""
+
+import json
+import zlib
+
+import orjson
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+
+class CompressedJSON(TypeDecorator):
+    """JSON payload stored as zlib-compressed bytes.
+
+    Suited to blobs the server never queries inside (e.g. BCF viewpoint
+    component lists): they compress roughly an order of magnitude and avoid
+    JSONB's per-key storage overhead. The mapped Python value stays a
+    plain dict/list.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        payload = json.dumps(value, separators=(",", ":")).encode()
+        return zlib.compress(payload, level=3)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return json.loads(zlib.decompress(value))
+
+
+class RawJSON(TypeDecorator):
+    """JSON payload stored as pre-encoded bytes, returned without decoding.
+
+    For columns the server only round-trips to the client (clash and
+    validation result blobs): writes accept a dict/list or ready-made
+    ``bytes``, reads return the raw JSON bytes so the response layer can
+    splice them straight into the output with ``orjson.Fragment`` — no
+    intermediate Python dict on either path.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        return orjson.dumps(value)
+
+    def process_result_value(self, value, dialect):
+        return value
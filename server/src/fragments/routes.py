@@ -1,15 +1,20 @@
+import asyncio
 import logging
 import os
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import FileResponse, JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.middleware import get_current_user
 from src.auth.models import User
 from src.db.database import get_db
-from src.fragments.service import get_or_generate_fragment, get_fragment_cache_dir
-from src.git.service import get_commit_log
+from src.fragments.service import (
+    get_fragment_cache_dir,
+    get_or_generate_fragment,
+    resolve_head_commit,
+)
+from src.git.service import get_commit_log, resolve_commit_oid
 from src.projects.routes import require_project_access
 
 logger = logging.getLogger(__name__)
@@ -17,8 +22,28 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _cache_headers(commit: str) -> dict[str, str]:
+    """Fragment artifacts are immutable per commit, so cache them hard."""
+    return {
+        "ETag": f'"{commit}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+
+
+def _not_modified(request: Request, commit: str) -> Response | None:
+    """Return a 304 if the client already holds this commit's artifact.
+
+    Checked right after the commit hash is resolved: a hit skips the cache
+    lookup, the disk probe and the file body entirely.
+    """
+    if request.headers.get("if-none-match") == f'"{commit}"':
+        return Response(status_code=304, headers=_cache_headers(commit))
+    return None
+
+
 @router.get("/{slug}/fragments/{file_path:path}")
 async def get_fragment(
+    request: Request,
     slug: str,
     file_path: str,
     branch: str = Query("main"),
@@ -31,10 +56,19 @@ async def get_fragment(
 
     # Resolve commit hash
     if not commit:
-        commits = get_commit_log(project.git_repo_path, branch, limit=1)
-        if not commits:
+        commit = await resolve_head_commit(project.id, project.git_repo_path, branch)
+        if not commit:
             raise HTTPException(status_code=404, detail="No commits found")
-        commit = commits[0].hash
+    else:
+        # Normalize refs/revspecs to the full oid before it becomes a
+        # cache key, DB row, disk dir or immutable ETag — a mutable name
+        # like "main" would pin stale artifacts for a year.
+        commit = await asyncio.to_thread(resolve_commit_oid, project.git_repo_path, commit)
+        if not commit:
+            raise HTTPException(status_code=404, detail="Commit not found")
+
+    if response := _not_modified(request, commit):
+        return response
 
     frag_path = await get_or_generate_fragment(
         db=db,
@@ -49,11 +83,14 @@ async def get_fragment(
     if not frag_path or not os.path.exists(frag_path):
         raise HTTPException(status_code=404, detail="Fragment not available. Generation may be in progress.")
 
-    return FileResponse(frag_path, media_type="application/octet-stream")
+    return FileResponse(
+        frag_path, media_type="application/octet-stream", headers=_cache_headers(commit)
+    )
 
 
 @router.get("/{slug}/fragments/{file_path:path}/properties")
 async def get_properties(
+    request: Request,
     slug: str,
     file_path: str,
     branch: str = Query("main"),
@@ -65,10 +102,17 @@ async def get_properties(
     project = await require_project_access(slug, user, db)
 
     if not commit:
-        commits = get_commit_log(project.git_repo_path, branch, limit=1)
-        if not commits:
+        commit = await resolve_head_commit(project.id, project.git_repo_path, branch)
+        if not commit:
             raise HTTPException(status_code=404, detail="No commits found")
-        commit = commits[0].hash
+    else:
+        # As in get_fragment: only the full oid is a valid cache key.
+        commit = await asyncio.to_thread(resolve_commit_oid, project.git_repo_path, commit)
+        if not commit:
+            raise HTTPException(status_code=404, detail="Commit not found")
+
+    if response := _not_modified(request, commit):
+        return response
 
     cache_dir = get_fragment_cache_dir(project.slug, commit)
     base_name = os.path.splitext(os.path.basename(file_path))[0]
@@ -77,11 +121,12 @@ async def get_properties(
     if not os.path.exists(props_path):
         raise HTTPException(status_code=404, detail="Properties not available")
 
-    return FileResponse(props_path, media_type="application/json")
+    return FileResponse(props_path, media_type="application/json", headers=_cache_headers(commit))
 
 
 @router.get("/{slug}/fragments/{file_path:path}/spatial")
 async def get_spatial_tree(
+    request: Request,
     slug: str,
     file_path: str,
     branch: str = Query("main"),
@@ -93,10 +138,17 @@ async def get_spatial_tree(
     project = await require_project_access(slug, user, db)
 
     if not commit:
-        commits = get_commit_log(project.git_repo_path, branch, limit=1)
-        if not commits:
+        commit = await resolve_head_commit(project.id, project.git_repo_path, branch)
+        if not commit:
             raise HTTPException(status_code=404, detail="No commits found")
-        commit = commits[0].hash
+    else:
+        # As in get_fragment: only the full oid is a valid cache key.
+        commit = await asyncio.to_thread(resolve_commit_oid, project.git_repo_path, commit)
+        if not commit:
+            raise HTTPException(status_code=404, detail="Commit not found")
+
+    if response := _not_modified(request, commit):
+        return response
 
     cache_dir = get_fragment_cache_dir(project.slug, commit)
     base_name = os.path.splitext(os.path.basename(file_path))[0]
@@ -105,7 +157,7 @@ async def get_spatial_tree(
     if not os.path.exists(spatial_path):
         raise HTTPException(status_code=404, detail="Spatial tree not available")
 
-    return FileResponse(spatial_path, media_type="application/json")
+    return FileResponse(spatial_path, media_type="application/json", headers=_cache_headers(commit))
 
 
 @router.post("/{slug}/fragments/{file_path:path}/generate")
@@ -1,23 +1,123 @@
-import json
+import asyncio
 import logging
 import os
-import subprocess
-import tempfile
 import uuid
 
-from sqlalchemy import select
+import orjson
+from cachetools import LRUCache
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import settings
 from src.fragments.models import FragmentCache
-from src.git.service import get_file_content, get_file_content_at_commit
+from src.git.service import get_commit_log, get_file_content, get_file_content_at_commit
 
 logger = logging.getLogger(__name__)
 
+# A branch head only moves on a push, so a short Redis TTL absorbs the
+# per-request git HEAD resolution on the viewer's polling endpoints. Write
+# endpoints invalidate eagerly, the TTL is just a safety net.
+_HEAD_CACHE_TTL = 30
+
+# (project_id, commit_hash, file_path) -> fragment_path. Commit hashes are
+# immutable, so entries never go stale and need no invalidation; a cheap
+# stat on hit guards against files evicted from the disk cache.
+_frag_path_cache: LRUCache = LRUCache(maxsize=10_000)
+
+# FragmentCache rows are an optimization, not request state, so they are
+# persisted by a background task in batches instead of a commit on the
+# request path. The queue holds plain value dicts for a core insert.
+_cache_write_queue: asyncio.Queue = asyncio.Queue()
+_CACHE_FLUSH_BATCH = 64
+_CACHE_FLUSH_INTERVAL = 0.5
+
+
+async def flush_fragment_cache_writes() -> None:
+    """Drain queued FragmentCache entries and commit them in batches.
+
+    Runs as a long-lived task started from the app lifespan. Conflicting
+    keys (another worker generated the same fragment) are ignored so one
+    duplicate cannot abort a whole batch.
+    """
+    from src.db.database import async_session, engine
+
+    while True:
+        batch = [await _cache_write_queue.get()]
+        # Collect more entries until the batch fills or the queue goes
+        # quiet for the flush interval.
+        while len(batch) < _CACHE_FLUSH_BATCH:
+            try:
+                batch.append(
+                    await asyncio.wait_for(_cache_write_queue.get(), _CACHE_FLUSH_INTERVAL)
+                )
+            except asyncio.TimeoutError:
+                break
+
+        if engine.dialect.name == "postgresql":
+            stmt = pg_insert(FragmentCache).values(batch).on_conflict_do_nothing()
+        else:
+            stmt = insert(FragmentCache).values(batch).prefix_with("OR IGNORE")
+
+        try:
+            async with async_session() as session:
+                await session.execute(stmt)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Fragment cache flush failed ({len(batch)} entries): {e}")
+
+
+def _head_cache_key(project_id, branch: str) -> str:
+    return f"head:{project_id}:{branch}"
+
+
+async def resolve_head_commit(project_id, repo_path: str, branch: str) -> str | None:
+    """Resolve the branch head, consulting the Redis cache first."""
+    redis = None
+    key = _head_cache_key(project_id, branch)
+    try:
+        from src.workers.queue import get_redis_pool
+        redis = await get_redis_pool()
+        cached = await redis.get(key)
+        if cached:
+            return cached.decode() if isinstance(cached, bytes) else cached
+    except Exception as e:
+        logger.debug(f"Head cache unavailable: {e}")
+
+    commits = get_commit_log(repo_path, branch, limit=1)
+    if not commits:
+        return None
+    commit = commits[0].hash
+    if redis is not None:
+        try:
+            await redis.set(key, commit, ex=_HEAD_CACHE_TTL)
+        except Exception as e:
+            logger.debug(f"Head cache write failed: {e}")
+    return commit
+
+
+async def invalidate_head_commit(project_id, branch: str) -> None:
+    """Drop the cached head after a commit/merge moves the branch."""
+    try:
+        from src.workers.queue import get_redis_pool
+        redis = await get_redis_pool()
+        await redis.delete(_head_cache_key(project_id, branch))
+    except Exception as e:
+        logger.debug(f"Head cache invalidation failed: {e}")
+
 
 def get_fragment_cache_dir(project_slug: str, commit_hash: str) -> str:
-    """Get the cache directory for fragments of a specific commit."""
-    cache_dir = os.path.join(settings.cache_dir, project_slug, "fragments", commit_hash)
+    """Get the cache directory for fragments of a specific commit.
+
+    Pure path construction — read paths hit this per request, and the old
+    makedirs here cost a stat per parent directory every call.
+    """
+    return os.path.join(settings.cache_dir, project_slug, "fragments", commit_hash)
+
+
+def ensure_fragment_cache_dir(project_slug: str, commit_hash: str) -> str:
+    """Create (if needed) and return the cache directory for a commit."""
+    cache_dir = get_fragment_cache_dir(project_slug, commit_hash)
     os.makedirs(cache_dir, exist_ok=True)
     return cache_dir
 
@@ -45,36 +145,44 @@ async def get_or_generate_fragment(
     Get a cached fragment or generate a new one.
     Returns the path to the .frag file, or None on failure.
     """
-    # Check database cache
-    result = await db.execute(
-        select(FragmentCache).where(
+    cache_key = (project_id, commit_hash, file_path)
+    cached_path = _frag_path_cache.get(cache_key)
+    if cached_path and os.path.exists(cached_path):
+        return cached_path
+
+    # Check database cache. Only the path is needed, and the lookup rides
+    # the uq_fragment_cache unique index, so fetch a single scalar instead
+    # of hydrating the ORM row.
+    cached_path = await db.scalar(
+        select(FragmentCache.fragment_path).where(
             FragmentCache.project_id == project_id,
             FragmentCache.file_path == file_path,
             FragmentCache.commit_hash == commit_hash,
         )
     )
-    cached = result.scalar_one_or_none()
-    if cached and os.path.exists(cached.fragment_path):
-        return cached.fragment_path
+    if cached_path and os.path.exists(cached_path):
+        _frag_path_cache[cache_key] = cached_path
+        return cached_path
 
     # Check filesystem cache
     existing = get_cached_fragment_path(project_slug, commit_hash, file_path)
     if existing:
+        _frag_path_cache[cache_key] = existing
         return existing
 
     # Generate fragment
     frag_path = await generate_fragment(project_slug, repo_path, file_path, commit_hash, branch)
     if frag_path:
-        # Store in database
-        cache_entry = FragmentCache(
-            project_id=project_id,
-            file_path=file_path,
-            commit_hash=commit_hash,
-            fragment_path=frag_path,
-            file_size=os.path.getsize(frag_path),
-        )
-        db.add(cache_entry)
-        await db.commit()
+        # Hand persistence to the background flusher; the response does
+        # not wait for the INSERT + COMMIT round trip.
+        _cache_write_queue.put_nowait({
+            "project_id": project_id,
+            "file_path": file_path,
+            "commit_hash": commit_hash,
+            "fragment_path": frag_path,
+            "file_size": os.path.getsize(frag_path),
+        })
+        _frag_path_cache[cache_key] = frag_path
 
     return frag_path
 
@@ -100,47 +208,47 @@ async def generate_fragment(
         logger.error(f"IFC file not found: {file_path} at {commit_hash or branch}")
         return None
 
-    cache_dir = get_fragment_cache_dir(project_slug, commit_hash)
+    cache_dir = ensure_fragment_cache_dir(project_slug, commit_hash)
     base_name = os.path.splitext(os.path.basename(file_path))[0]
     frag_output = os.path.join(cache_dir, f"{base_name}.frag")
     props_output = os.path.join(cache_dir, f"{base_name}.properties.json")
 
-    # Write IFC to temp file
-    with tempfile.NamedTemporaryFile(suffix=".ifc", delete=False) as tmp:
-        tmp.write(ifc_content)
-        tmp_path = tmp.name
-
     try:
-        # Run Node.js converter
-        result = subprocess.run(
-            ["node", settings.node_converter_path, tmp_path, frag_output],
-            capture_output=True,
-            timeout=600,  # 10 min timeout
+        # Pipe the IFC bytes straight to the Node converter's stdin ("-"):
+        # no temp file, so the content crosses the page cache once instead
+        # of twice, and the subprocess runs off the event loop.
+        proc = await asyncio.create_subprocess_exec(
+            "node",
+            settings.node_converter_path,
+            "-",
+            frag_output,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
         )
-
-        if result.returncode != 0:
-            logger.error(f"Fragment conversion failed: {result.stderr.decode()}")
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(ifc_content), timeout=600)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            logger.error(f"Fragment conversion timed out for {file_path}")
+            return None
+
+        if proc.returncode != 0:
+            logger.error(f"Fragment conversion failed: {stderr.decode()}")
             # Fallback: try Python-based conversion
             return await _generate_fragment_python(ifc_content, frag_output, props_output)
 
-        # Generate properties JSON using IfcOpenShell
-        await _generate_properties(ifc_content, props_output)
-
-        # Generate spatial tree
+        # Generate properties + spatial tree from a single IfcOpenShell parse
         spatial_output = os.path.join(cache_dir, f"{base_name}.spatial-tree.json")
-        await _generate_spatial_tree(ifc_content, spatial_output)
+        await _generate_ifc_artifacts(ifc_content, props_output, spatial_output)
 
         logger.info(f"Fragment generated: {frag_output}")
         return frag_output
 
-    except subprocess.TimeoutExpired:
-        logger.error(f"Fragment conversion timed out for {file_path}")
-        return None
     except FileNotFoundError:
         logger.warning("Node.js converter not available, trying Python fallback")
         return await _generate_fragment_python(ifc_content, frag_output, props_output)
-    finally:
-        os.unlink(tmp_path)
 
 
 async def _generate_fragment_python(
@@ -148,7 +256,7 @@ async def _generate_fragment_python(
 ) -> str | None:
     """Fallback: generate properties using IfcOpenShell (without .frag)."""
     try:
-        await _generate_properties(ifc_content, props_output)
+        await _generate_ifc_artifacts(ifc_content, props_output)
         # Without Node.js, we can't generate .frag files
         # The frontend will need to convert IFC client-side
         logger.warning("No .frag generated (Node.js unavailable), frontend will convert client-side")
@@ -158,85 +266,79 @@ async def _generate_fragment_python(
         return None
 
 
-async def _generate_properties(ifc_content: bytes, output_path: str):
-    """Generate a properties JSON file from IFC content using IfcOpenShell."""
-    try:
-        import ifcopenshell
-        import tempfile
-
-        with tempfile.NamedTemporaryFile(suffix=".ifc", delete=False) as tmp:
-            tmp.write(ifc_content)
-            tmp_path = tmp.name
-
-        try:
-            model = ifcopenshell.open(tmp_path)
-            properties = {}
-
-            for element in model.by_type("IfcProduct"):
-                express_id = element.id()
-                props = {
-                    "expressID": express_id,
-                    "GlobalId": element.GlobalId,
-                    "Class": element.is_a(),
-                    "Name": getattr(element, "Name", None),
-                    "ObjectType": getattr(element, "ObjectType", None),
-                    "Description": getattr(element, "Description", None),
-                    "Tag": getattr(element, "Tag", None),
-                }
-
-                # Get property sets
-                psets = {}
-                if hasattr(element, "IsDefinedBy"):
-                    for rel in element.IsDefinedBy:
-                        if rel.is_a("IfcRelDefinesByProperties"):
-                            pset = rel.RelatingPropertyDefinition
-                            if pset.is_a("IfcPropertySet"):
-                                pset_props = {}
-                                for prop in pset.HasProperties:
-                                    if prop.is_a("IfcPropertySingleValue"):
-                                        val = prop.NominalValue
-                                        pset_props[prop.Name] = val.wrappedValue if val else None
-                                psets[pset.Name] = pset_props
-
-                props["propertySets"] = psets
-                properties[str(express_id)] = props
-
-            with open(output_path, "w") as f:
-                json.dump(properties, f)
-
-        finally:
-            os.unlink(tmp_path)
+async def _generate_ifc_artifacts(
+    ifc_content: bytes, props_output: str, spatial_output: str | None = None
+):
+    """Generate the properties JSON (and optionally the spatial tree).
 
+    Both artifacts come from one ifcopenshell parse: the STEP parse is the
+    dominant cost, so sharing the model roughly halves generation time.
+    The parse and walks are CPU-bound and run off the event loop.
+    """
+    try:
+        import ifcopenshell  # noqa: F401
     except ImportError:
         logger.warning("IfcOpenShell not available for properties generation")
-    except Exception as e:
-        logger.error(f"Properties generation failed: {e}")
-
+        return
 
-async def _generate_spatial_tree(ifc_content: bytes, output_path: str):
-    """Generate a spatial tree JSON from IFC content."""
     try:
-        import ifcopenshell
-        import tempfile
-
-        with tempfile.NamedTemporaryFile(suffix=".ifc", delete=False) as tmp:
-            tmp.write(ifc_content)
-            tmp_path = tmp.name
-
-        try:
-            model = ifcopenshell.open(tmp_path)
-            tree = _build_spatial_tree(model)
-
-            with open(output_path, "w") as f:
-                json.dump(tree, f)
-
-        finally:
-            os.unlink(tmp_path)
-
-    except ImportError:
-        logger.warning("IfcOpenShell not available for spatial tree generation")
+        await asyncio.to_thread(_write_ifc_artifacts, ifc_content, props_output, spatial_output)
     except Exception as e:
-        logger.error(f"Spatial tree generation failed: {e}")
+        logger.error(f"IFC artifact generation failed: {e}")
+
+
+def _write_ifc_artifacts(ifc_content: bytes, props_output: str, spatial_output: str | None):
+    import ifcopenshell
+
+    # Parse straight from the git blob already in memory; the temp-file
+    # round trip wrote and re-read the whole model just to satisfy open().
+    model = ifcopenshell.file.from_string(ifc_content.decode("utf-8", errors="replace"))
+
+    # orjson writes the whole document in one C pass; on six-figure element
+    # counts this is several times faster than the stdlib encoder and
+    # allocates no intermediate Python strings.
+    with open(props_output, "wb") as f:
+        f.write(orjson.dumps(_extract_properties(model)))
+
+    if spatial_output:
+        with open(spatial_output, "wb") as f:
+            f.write(orjson.dumps(_build_spatial_tree(model)))
+
+
+def _extract_properties(model) -> dict:
+    """Walk every IfcProduct and collect its attributes and property sets."""
+    # One pass over the defining relations builds element id -> psets, so
+    # each pset's properties are decoded once and shared between the
+    # elements that reference it — O(rels + products) instead of walking
+    # the IsDefinedBy inverse per product.
+    psets_by_element: dict[int, dict] = {}
+    for rel in model.by_type("IfcRelDefinesByProperties"):
+        pset = rel.RelatingPropertyDefinition
+        if not pset.is_a("IfcPropertySet"):
+            continue
+        pset_props = {}
+        for prop in pset.HasProperties:
+            if prop.is_a("IfcPropertySingleValue"):
+                val = prop.NominalValue
+                pset_props[prop.Name] = val.wrappedValue if val else None
+        for obj in rel.RelatedObjects:
+            psets_by_element.setdefault(obj.id(), {})[pset.Name] = pset_props
+
+    properties = {}
+    for element in model.by_type("IfcProduct"):
+        express_id = element.id()
+        properties[str(express_id)] = {
+            "expressID": express_id,
+            "GlobalId": element.GlobalId,
+            "Class": element.is_a(),
+            "Name": getattr(element, "Name", None),
+            "ObjectType": getattr(element, "ObjectType", None),
+            "Description": getattr(element, "Description", None),
+            "Tag": getattr(element, "Tag", None),
+            "propertySets": psets_by_element.get(express_id, {}),
+        }
+
+    return properties
 
 
 def _build_spatial_tree(model) -> dict:
@@ -249,7 +351,25 @@ def _build_spatial_tree(model) -> dict:
         tree["name"] = getattr(project, "Name", "Project") or "Project"
         tree["expressID"] = project.id()
 
-    # Build hierarchy: Project -> Site -> Building -> Storey -> Space
+    # One pass over the containment relations: storey express id -> elements.
+    # Avoids touching the ContainsElements inverse per storey.
+    contained: dict[int, list] = {}
+    for rel in model.by_type("IfcRelContainedInSpatialStructure"):
+        contained.setdefault(rel.RelatingStructure.id(), []).extend(rel.RelatedElements)
+
+    def _children_of(obj, ifc_class: str) -> list:
+        """Objects of ifc_class aggregated directly under obj."""
+        out = []
+        for rel in getattr(obj, "IsDecomposedBy", None) or ():
+            for child in rel.RelatedObjects:
+                if child.is_a(ifc_class):
+                    out.append(child)
+        return out
+
+    # Build hierarchy: Project -> Site -> Building -> Storey -> Element.
+    # Walking IfcRelAggregates keeps each storey under its actual building
+    # (the old nested by_type loops attached every storey to every building,
+    # S*B*T scans on multi-building models).
     for site in model.by_type("IfcSite"):
         site_node = {
             "type": "IfcSite",
@@ -259,7 +379,7 @@ def _build_spatial_tree(model) -> dict:
         }
         tree["children"].append(site_node)
 
-        for building in model.by_type("IfcBuilding"):
+        for building in _children_of(site, "IfcBuilding"):
             building_node = {
                 "type": "IfcBuilding",
                 "name": getattr(building, "Name", "Building") or "Building",
@@ -268,7 +388,7 @@ def _build_spatial_tree(model) -> dict:
             }
             site_node["children"].append(building_node)
 
-            for storey in model.by_type("IfcBuildingStorey"):
+            for storey in _children_of(building, "IfcBuildingStorey"):
                 storey_node = {
                     "type": "IfcBuildingStorey",
                     "name": getattr(storey, "Name", "Storey") or "Storey",
@@ -277,14 +397,11 @@ def _build_spatial_tree(model) -> dict:
                 }
                 building_node["children"].append(storey_node)
 
-                # Get elements contained in this storey
-                if hasattr(storey, "ContainsElements"):
-                    for rel in storey.ContainsElements:
-                        for element in rel.RelatedElements:
-                            storey_node["children"].append({
-                                "type": element.is_a(),
-                                "name": getattr(element, "Name", None) or element.is_a(),
-                                "expressID": element.id(),
-                            })
+                for element in contained.get(storey.id(), ()):
+                    storey_node["children"].append({
+                        "type": element.is_a(),
+                        "name": getattr(element, "Name", None) or element.is_a(),
+                        "expressID": element.id(),
+                    })
 
     return tree
@@ -1,6 +1,5 @@
+import asyncio
 import logging
-import os
-import tempfile
 
 import pygit2
 
@@ -22,11 +21,14 @@ def get_diff_between_commits(
     if not from_commit or not to_commit:
         return {"error": "Commit not found"}
 
-    diff = repo.diff(from_commit, to_commit)
+    # Tree-to-tree diff with no context lines; iterating deltas reads the
+    # file-level metadata without materializing per-hunk patch objects.
+    diff = from_commit.tree.diff_to_tree(
+        to_commit.tree, context_lines=0, interhunk_lines=0
+    )
 
     changes = []
-    for patch in diff:
-        delta = patch.delta
+    for delta in diff.deltas:
         changes.append({
             "old_path": delta.old_file.path,
             "new_path": delta.new_file.path,
@@ -47,7 +49,7 @@ def get_diff_between_commits(
     }
 
 
-def get_semantic_ifc_diff(
+async def get_semantic_ifc_diff(
     repo_path: str,
     from_hash: str,
     to_hash: str,
@@ -70,112 +72,116 @@ def get_semantic_ifc_diff(
     except ImportError:
         return {"error": "IfcOpenShell not available"}
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        result = {"added": [], "removed": [], "modified": [], "unchanged_count": 0}
-
-        from_model = None
-        to_model = None
-
-        if from_content:
-            from_path = os.path.join(tmpdir, "from.ifc")
-            with open(from_path, "wb") as f:
-                f.write(from_content)
-            from_model = ifcopenshell.open(from_path)
-
-        if to_content:
-            to_path = os.path.join(tmpdir, "to.ifc")
-            with open(to_path, "wb") as f:
-                f.write(to_content)
-            to_model = ifcopenshell.open(to_path)
-
-        if not from_model:
-            # Everything in to_model is new
-            for element in to_model.by_type("IfcProduct"):
-                result["added"].append(_element_summary(element))
-            return result
-
-        if not to_model:
-            # Everything in from_model is removed
-            for element in from_model.by_type("IfcProduct"):
-                result["removed"].append(_element_summary(element))
-            return result
-
-        # Compare by GlobalId
-        from_elements = {e.GlobalId: e for e in from_model.by_type("IfcProduct")}
-        to_elements = {e.GlobalId: e for e in to_model.by_type("IfcProduct")}
-
-        from_ids = set(from_elements.keys())
-        to_ids = set(to_elements.keys())
-
-        # Added elements
-        for gid in to_ids - from_ids:
-            result["added"].append(_element_summary(to_elements[gid]))
-
-        # Removed elements
-        for gid in from_ids - to_ids:
-            result["removed"].append(_element_summary(from_elements[gid]))
-
-        # Check modified (same GlobalId, different attributes)
-        for gid in from_ids & to_ids:
-            old_el = from_elements[gid]
-            new_el = to_elements[gid]
-            changes = _compare_elements(old_el, new_el)
-            if changes:
-                summary = _element_summary(new_el)
-                summary["changes"] = changes
-                result["modified"].append(summary)
-            else:
-                result["unchanged_count"] += 1
+    result = {"added": [], "removed": [], "modified": [], "unchanged_count": 0}
+
+    def _parse(content: bytes | None):
+        if not content:
+            return None
+        return ifcopenshell.file.from_string(content.decode("utf-8", errors="replace"))
+
+    # The two STEP parses dominate diff latency and release the GIL, so
+    # run them in parallel worker threads instead of back to back on the
+    # event loop.
+    from_model, to_model = await asyncio.gather(
+        asyncio.to_thread(_parse, from_content),
+        asyncio.to_thread(_parse, to_content),
+    )
+
+    if not from_model:
+        # Everything in to_model is new
+        for element in to_model.by_type("IfcProduct"):
+            result["added"].append(_element_summary(element.get_info()))
+        return result
 
+    if not to_model:
+        # Everything in from_model is removed
+        for element in from_model.by_type("IfcProduct"):
+            result["removed"].append(_element_summary(element.get_info()))
         return result
 
+    # Index by GlobalId, materializing each element's attributes with one
+    # get_info() call up front — the summary and compare steps then work on
+    # plain dicts instead of going back through the ifcopenshell FFI.
+    # dict.keys() views support set algebra directly, so no separate id
+    # sets need to be materialized.
+    from_infos = {i["GlobalId"]: i for i in (e.get_info() for e in from_model.by_type("IfcProduct"))}
+    to_infos = {i["GlobalId"]: i for i in (e.get_info() for e in to_model.by_type("IfcProduct"))}
+
+    # Added elements
+    for gid in to_infos.keys() - from_infos.keys():
+        result["added"].append(_element_summary(to_infos[gid]))
+
+    # Removed elements
+    for gid in from_infos.keys() - to_infos.keys():
+        result["removed"].append(_element_summary(from_infos[gid]))
+
+    # Check modified (same GlobalId, different attributes)
+    for gid in from_infos.keys() & to_infos.keys():
+        new_info = to_infos[gid]
+        changes = _compare_elements(from_infos[gid], new_info)
+        if changes:
+            summary = _element_summary(new_info)
+            summary["changes"] = changes
+            result["modified"].append(summary)
+        else:
+            result["unchanged_count"] += 1
+
+    return result
+
 
 def _get_file_at_commit(repo: pygit2.Repository, commit_hash: str, file_path: str) -> bytes | None:
     commit = repo.get(pygit2.Oid(hex=commit_hash))
     if not commit:
         return None
-    tree = commit.tree
     try:
-        parts = file_path.strip("/").split("/")
-        for part in parts[:-1]:
-            entry = tree[part]
-            tree = repo.get(entry.id)
-        entry = tree[parts[-1]]
-        blob = repo.get(entry.id)
-        return blob.data
+        # pygit2 resolves slash paths in one lookup; no need to fetch each
+        # intermediate tree from the object database ourselves.
+        entry = commit.tree[file_path.strip("/")]
+        return repo.get(entry.id).data
     except (KeyError, TypeError):
         return None
 
 
-def _element_summary(element) -> dict:
+def _element_summary(info: dict) -> dict:
+    """Summarize an element from its get_info() dict."""
     return {
-        "global_id": element.GlobalId,
-        "ifc_class": element.is_a(),
-        "name": getattr(element, "Name", None),
-        "type": getattr(element, "ObjectType", None),
+        "global_id": info.get("GlobalId"),
+        "ifc_class": info.get("type"),
+        "name": info.get("Name"),
+        "type": info.get("ObjectType"),
     }
 
 
-def _compare_elements(old_el, new_el) -> list[dict]:
-    """Compare two IFC elements with the same GlobalId."""
+# "type" is get_info()'s class-name entry, reported in the summary rather
+# than as an attribute change; "id" is the express id, which is not stable
+# across revisions.
+_EXCLUDED_ATTRS = frozenset({"id", "type", "GlobalId", "OwnerHistory"})
+
+
+def _compare_elements(old_info: dict, new_info: dict) -> list[dict]:
+    """Compare two IFC elements via their get_info() dicts."""
     changes = []
-    # Compare direct attributes
-    for attr_name in old_el.get_info().keys():
-        if attr_name in ("id", "GlobalId", "OwnerHistory"):
+    for attr_name in old_info.keys() | new_info.keys():
+        if attr_name in _EXCLUDED_ATTRS:
+            continue
+        old_val = old_info.get(attr_name)
+        new_val = new_info.get(attr_name)
+        # Fast path: same type and equal means unchanged, no stringifying
+        # and no exception machinery for the overwhelming majority of
+        # attributes.
+        if type(old_val) is type(new_val) and old_val == new_val:
             continue
-        old_val = getattr(old_el, attr_name, None)
-        new_val = getattr(new_el, attr_name, None)
         try:
             old_str = str(old_val) if old_val is not None else None
             new_str = str(new_val) if new_val is not None else None
-            if old_str != new_str:
-                changes.append({
-                    "attribute": attr_name,
-                    "old_value": old_str,
-                    "new_value": new_str,
-                })
         except Exception:
-            pass
+            continue
+        if old_str != new_str:
+            changes.append({
+                "attribute": attr_name,
+                "old_value": old_str,
+                "new_value": new_str,
+            })
     return changes
 
 
@@ -1,16 +1,16 @@
+import asyncio
 import logging
 import os
-import subprocess
 import tempfile
 
 import pygit2
 
-from src.git.service import open_repo
+from src.git.service import open_repo, write_lock
 
 logger = logging.getLogger(__name__)
 
 
-def merge_branches(
+async def merge_branches(
     repo_path: str,
     source_branch: str,
     target_branch: str,
@@ -33,26 +33,26 @@ def merge_branches(
     source_commit = repo.get(repo.references[source_ref].target)
     target_commit = repo.get(repo.references[target_ref].target)
 
-    # Find merge base
-    merge_base = repo.merge_base(source_commit.id, target_commit.id)
-    if not merge_base:
-        return {"status": "error", "message": "No common ancestor found"}
+    # merge_analysis is a cheap ancestry check; branch on it before paying
+    # for merge_base or the full in-memory merge index.
+    analysis, _ = repo.merge_analysis(source_commit.id, target_ref)
+
+    if analysis & pygit2.GIT_MERGE_ANALYSIS_UP_TO_DATE:
+        return {"status": "up-to-date", "message": "Already up to date"}
 
-    # Check if fast-forward is possible
-    if merge_base == target_commit.id:
-        # Fast-forward
-        repo.references[target_ref].set_target(source_commit.id)
+    if analysis & pygit2.GIT_MERGE_ANALYSIS_FASTFORWARD:
+        with write_lock(repo_path):
+            repo.references[target_ref].set_target(source_commit.id)
         return {
             "status": "fast-forward",
             "commit": str(source_commit.id),
             "message": f"Fast-forwarded {target_branch} to {source_branch}",
         }
 
-    # Perform merge
-    merge_result = repo.merge_analysis(source_commit.id)
-
-    if merge_result[0] & pygit2.GIT_MERGE_ANALYSIS_UP_TO_DATE:
-        return {"status": "up-to-date", "message": "Already up to date"}
+    # Find merge base (needed for ifcmerge's three-way inputs)
+    merge_base = repo.merge_base(source_commit.id, target_commit.id)
+    if not merge_base:
+        return {"status": "error", "message": "No common ancestor found"}
 
     # Try automatic merge via index
     index = repo.merge_commits(target_commit, source_commit)
@@ -65,7 +65,7 @@ def merge_branches(
         ]
 
         if ifc_conflicts:
-            resolved = _try_ifcmerge(repo, merge_base, target_commit, source_commit, ifc_conflicts)
+            resolved = await _try_ifcmerge(repo, merge_base, target_commit, source_commit, ifc_conflicts)
             if resolved:
                 # Remove resolved conflicts from index
                 for path in ifc_conflicts:
@@ -92,14 +92,15 @@ def merge_branches(
         message = f"Merge branch '{source_branch}' into {target_branch}"
 
     sig = pygit2.Signature(author_name, author_email)
-    commit_id = repo.create_commit(
-        target_ref,
-        sig,
-        sig,
-        message,
-        tree_id,
-        [target_commit.id, source_commit.id],
-    )
+    with write_lock(repo_path):
+        commit_id = repo.create_commit(
+            target_ref,
+            sig,
+            sig,
+            message,
+            tree_id,
+            [target_commit.id, source_commit.id],
+        )
 
     return {
         "status": "merged",
@@ -110,17 +111,33 @@ def merge_branches(
 
 def _get_conflict_paths(index) -> list[str]:
     """Extract conflicting file paths from a merge index."""
-    paths = []
+    # dict keys dedup in O(1) per path while keeping first-seen order;
+    # `path not in list` was quadratic on large conflict sets.
+    paths: dict[str, None] = {}
     if index.conflicts:
         for conflict in index.conflicts:
             ancestor, ours, theirs = conflict
-            path = (ours or theirs or ancestor).path
-            if path not in paths:
-                paths.append(path)
-    return paths
+            paths[(ours or theirs or ancestor).path] = None
+    return list(paths)
+
+
+async def _run(*args: str, timeout: float) -> tuple[int, bytes, bytes]:
+    """Run a command off the event loop, killing it on timeout."""
+    proc = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return proc.returncode, stdout, stderr
 
 
-def _try_ifcmerge(
+async def _try_ifcmerge(
     repo: pygit2.Repository,
     base_oid: pygit2.Oid,
     ours_commit: pygit2.Commit,
@@ -133,51 +150,59 @@ def _try_ifcmerge(
     """
     # Check if ifcmerge is available
     try:
-        subprocess.run(["ifcmerge", "--version"], capture_output=True, check=True)
-    except (FileNotFoundError, subprocess.CalledProcessError):
+        returncode, _, _ = await _run("ifcmerge", "--version", timeout=30)
+        if returncode != 0:
+            raise FileNotFoundError
+    except (FileNotFoundError, asyncio.TimeoutError):
         logger.warning("ifcmerge not available, IFC conflicts cannot be auto-resolved")
         return None
 
     base_commit = repo.get(base_oid)
-    resolved = {}
-
-    for ifc_path in ifc_paths:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Extract the three versions
-            base_file = os.path.join(tmpdir, "base.ifc")
-            ours_file = os.path.join(tmpdir, "ours.ifc")
-            theirs_file = os.path.join(tmpdir, "theirs.ifc")
-            output_file = os.path.join(tmpdir, "merged.ifc")
-
-            _extract_file(repo, base_commit.tree, ifc_path, base_file)
-            _extract_file(repo, ours_commit.tree, ifc_path, ours_file)
-            _extract_file(repo, theirs_commit.tree, ifc_path, theirs_file)
-
-            try:
-                result = subprocess.run(
-                    ["ifcmerge", base_file, ours_file, theirs_file, "-o", output_file],
-                    capture_output=True,
-                    timeout=300,
-                )
-                if result.returncode == 0 and os.path.exists(output_file):
+
+    # ifcmerge is CPU-bound and independent per file; run the conflicting
+    # files concurrently, capped at the core count.
+    semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+
+    async def _merge_one(ifc_path: str) -> bytes | None:
+        async with semaphore:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                # Extract the three versions
+                base_file = os.path.join(tmpdir, "base.ifc")
+                ours_file = os.path.join(tmpdir, "ours.ifc")
+                theirs_file = os.path.join(tmpdir, "theirs.ifc")
+                output_file = os.path.join(tmpdir, "merged.ifc")
+
+                _extract_file(repo, base_commit.tree, ifc_path, base_file)
+                _extract_file(repo, ours_commit.tree, ifc_path, ours_file)
+                _extract_file(repo, theirs_commit.tree, ifc_path, theirs_file)
+
+                try:
+                    returncode, _, stderr = await _run(
+                        "ifcmerge", base_file, ours_file, theirs_file, "-o", output_file,
+                        timeout=300,
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"ifcmerge timed out for {ifc_path}")
+                    return None
+
+                if returncode == 0 and os.path.exists(output_file):
                     with open(output_file, "rb") as f:
-                        resolved[ifc_path] = f.read()
+                        content = f.read()
                     logger.info(f"ifcmerge resolved {ifc_path}")
-                else:
-                    logger.warning(f"ifcmerge failed for {ifc_path}: {result.stderr.decode()}")
-            except subprocess.TimeoutExpired:
-                logger.warning(f"ifcmerge timed out for {ifc_path}")
+                    return content
+                logger.warning(f"ifcmerge failed for {ifc_path}: {stderr.decode()}")
+                return None
+
+    merged = await asyncio.gather(*(_merge_one(path) for path in ifc_paths))
+    resolved = {path: content for path, content in zip(ifc_paths, merged) if content}
 
     return resolved if resolved else None
 
 
 def _extract_file(repo: pygit2.Repository, tree: pygit2.Tree, path: str, dest: str):
     """Extract a single file from a tree to disk."""
-    parts = path.split("/")
-    for part in parts[:-1]:
-        entry = tree[part]
-        tree = repo.get(entry.id)
-    entry = tree[parts[-1]]
-    blob = repo.get(entry.id)
+    # Slash paths resolve in a single lookup instead of fetching each
+    # intermediate tree object from the ODB.
+    blob = repo.get(tree[path].id)
     with open(dest, "wb") as f:
         f.write(blob.data)
@@ -1,20 +1,53 @@
+import asyncio
 import logging
+import os
+import tempfile
+from pathlib import PurePosixPath
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Query
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.middleware import get_current_user
+from src.cache import get_or_set
 from src.auth.models import User
 from src.db.database import get_db
+from src.fragments.service import invalidate_head_commit
 from src.git import service as git_svc
 from src.git.diff_service import get_diff_between_commits, get_semantic_ifc_diff
 from src.git.merge_service import merge_branches
 from src.projects.routes import require_project_access
 
+try:
+    from src.workers.queue import enqueue_fragment_generation
+except ImportError:  # worker queue is optional in dev setups
+    enqueue_fragment_generation = None
+
 logger = logging.getLogger(__name__)
 
+_IFC_EXTS = (".ifc", ".ifcxml", ".ifczip")
+
+# Keep strong references to fire-and-forget enqueue tasks so they aren't
+# garbage-collected mid-flight.
+_enqueue_tasks: set[asyncio.Task] = set()
+
+
+def _queue_fragment_generation(project_id, file_path: str, commit_hash: str) -> None:
+    """Kick off fragment generation without holding up the HTTP response."""
+    if not (enqueue_fragment_generation and file_path.lower().endswith(_IFC_EXTS)):
+        return
+
+    async def _safe_enqueue():
+        try:
+            await enqueue_fragment_generation(str(project_id), file_path, commit_hash)
+        except Exception as e:
+            logger.warning(f"Failed to queue fragment generation: {e}")
+
+    task = asyncio.create_task(_safe_enqueue())
+    _enqueue_tasks.add(task)
+    task.add_done_callback(_enqueue_tasks.discard)
+
 router = APIRouter()
 
 
@@ -43,10 +76,90 @@ class CommitResponse(BaseModel):
     timestamp: int
 
 
+_UPLOAD_CHUNK = 4 * 1024 * 1024
+_UPLOAD_SPOOL_MAX = 8 << 20
+
+# TTL for tip-keyed Redis entries; the tip in the key makes stale reads
+# impossible, the TTL just bounds Redis growth.
+_GIT_CACHE_TTL = 300
+
+
+def _normalize_repo_path(file_path: str) -> str:
+    """Normalize a repo-relative path, rejecting traversal attempts."""
+    pure = PurePosixPath(file_path)
+    if pure.is_absolute() or ".." in pure.parts or not pure.parts:
+        raise HTTPException(status_code=400, detail="Invalid file path")
+    return str(pure)
+
+
+def _etag_headers(oid_hex: str) -> dict[str, str]:
+    return {
+        "ETag": f'"{oid_hex}"',
+        "Cache-Control": "private, max-age=0, must-revalidate",
+    }
+
+
+
+async def _commit_upload(
+    repo_path: str,
+    file_path: str,
+    file: UploadFile,
+    message: str,
+    user: User,
+    branch: str,
+) -> str:
+    """
+    Stream an upload into the repo in chunks so peak memory stays bounded
+    by the chunk size instead of the file size. Small files stay in RAM;
+    anything past the spool threshold spills to a named temp file so
+    libgit2 can read and hash it from disk without a Python copy.
+    """
+    buf = bytearray()
+    spill = None
+    try:
+        while chunk := await file.read(_UPLOAD_CHUNK):
+            if spill is not None:
+                spill.write(chunk)
+            else:
+                buf += chunk
+                if len(buf) > _UPLOAD_SPOOL_MAX:
+                    spill = tempfile.NamedTemporaryFile(delete=False, suffix=".upload")
+                    spill.write(buf)
+                    buf = bytearray()
+        if spill is not None:
+            spill.close()
+            return await git_svc.enqueue_write(
+                repo_path,
+                file_path,
+                disk_path=spill.name,
+                message=message,
+                author_name=user.username,
+                author_email=user.email,
+                branch=branch,
+            )
+        return await git_svc.enqueue_write(
+            repo_path,
+            file_path,
+            data=bytes(buf),
+            message=message,
+            author_name=user.username,
+            author_email=user.email,
+            branch=branch,
+        )
+    finally:
+        if spill is not None:
+            spill.close()
+            try:
+                os.unlink(spill.name)
+            except OSError:
+                pass
+
+
 # --- File Endpoints ---
 
 @router.get("/{slug}/files")
 async def list_files(
+    request: Request,
     slug: str,
     branch: str = Query("main"),
     path: str = Query(""),
@@ -54,7 +167,27 @@ async def list_files(
     db: AsyncSession = Depends(get_db),
 ):
     project = await require_project_access(slug, user, db)
-    files = git_svc.list_files(project.git_repo_path, branch, path)
+    repo_path = project.git_repo_path
+    tip = await asyncio.to_thread(git_svc.branch_tip, repo_path, branch)
+
+    if tip is None:
+        tree_oid, files = None, []
+    else:
+        async def _produce():
+            oid, entries = await asyncio.to_thread(git_svc.list_files, repo_path, branch, path)
+            return {"tree_oid": oid, "files": entries}
+
+        listing = await get_or_set(f"gitfiles:{repo_path}:{tip}:{path}", _GIT_CACHE_TTL, _produce)
+        tree_oid, files = listing["tree_oid"], listing["files"]
+    # The tree oid is a strong validator: any change under this path
+    # yields a new tree, so polling clients can revalidate for free.
+    if tree_oid:
+        if request.headers.get("if-none-match") == f'"{tree_oid}"':
+            return Response(status_code=304)
+        return ORJSONResponse(
+            {"files": files, "branch": branch, "path": path},
+            headers=_etag_headers(tree_oid),
+        )
     return {"files": files, "branch": branch, "path": path}
 
 
@@ -70,35 +203,25 @@ async def upload_file(
 ):
     project = await require_project_access(slug, user, db, required_role="editor")
 
-    file_data = await file.read()
-    file_path = f"{path}/{file.filename}".strip("/") if path else file.filename
+    file_path = _normalize_repo_path(
+        str(PurePosixPath(path, file.filename)) if path else file.filename
+    )
 
     if not message:
         message = f"Upload {file_path}"
 
-    commit_hash = git_svc.commit_file(
-        repo_path=project.git_repo_path,
-        file_path=file_path,
-        file_data=file_data,
-        message=message,
-        author_name=user.username,
-        author_email=user.email,
-        branch=branch,
-    )
+    commit_hash = await _commit_upload(project.git_repo_path, file_path, file, message, user, branch)
+    await invalidate_head_commit(project.id, branch)
 
     # Queue fragment generation if it's an IFC file
-    if file_path.lower().endswith(".ifc"):
-        try:
-            from src.workers.queue import enqueue_fragment_generation
-            await enqueue_fragment_generation(str(project.id), file_path, commit_hash)
-        except Exception as e:
-            logger.warning(f"Failed to queue fragment generation: {e}")
+    _queue_fragment_generation(project.id, file_path, commit_hash)
 
     return FileUploadResponse(commit_hash=commit_hash, file_path=file_path, message=message)
 
 
 @router.get("/{slug}/files/{file_path:path}")
 async def download_file(
+    request: Request,
     slug: str,
     file_path: str,
     branch: str = Query("main"),
@@ -107,25 +230,32 @@ async def download_file(
     db: AsyncSession = Depends(get_db),
 ):
     project = await require_project_access(slug, user, db)
+    file_path = _normalize_repo_path(file_path)
 
-    if commit:
-        content = git_svc.get_file_content_at_commit(project.git_repo_path, file_path, commit)
-    else:
-        content = git_svc.get_file_content(project.git_repo_path, file_path, branch)
+    found = await asyncio.to_thread(
+        git_svc.open_blob_stream, project.git_repo_path, file_path, branch, commit
+    )
 
-    if content is None:
+    if found is None:
         raise HTTPException(status_code=404, detail="File not found")
 
+    blob_oid, size, chunks = found
+    # Blobs are content-addressed, so the oid is a strong ETag: a client
+    # that already holds this revision skips the payload entirely.
+    if request.headers.get("if-none-match") == f'"{blob_oid}"':
+        return Response(status_code=304)
+
     media_type = "application/octet-stream"
     if file_path.lower().endswith(".ifc"):
         media_type = "application/x-step"
 
     filename = file_path.split("/")[-1]
-    return Response(
-        content=content,
-        media_type=media_type,
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    headers = _etag_headers(blob_oid)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    headers["Content-Length"] = str(size)
+    # Chunked body keeps peak memory at the chunk size instead of holding
+    # the whole model as one bytes object alongside libgit2's buffer.
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
 
 
 @router.put("/{slug}/files/{file_path:path}", response_model=FileUploadResponse)
@@ -139,28 +269,15 @@ async def update_file(
     db: AsyncSession = Depends(get_db),
 ):
     project = await require_project_access(slug, user, db, required_role="editor")
-
-    file_data = await file.read()
+    file_path = _normalize_repo_path(file_path)
 
     if not message:
         message = f"Update {file_path}"
 
-    commit_hash = git_svc.commit_file(
-        repo_path=project.git_repo_path,
-        file_path=file_path,
-        file_data=file_data,
-        message=message,
-        author_name=user.username,
-        author_email=user.email,
-        branch=branch,
-    )
+    commit_hash = await _commit_upload(project.git_repo_path, file_path, file, message, user, branch)
+    await invalidate_head_commit(project.id, branch)
 
-    if file_path.lower().endswith(".ifc"):
-        try:
-            from src.workers.queue import enqueue_fragment_generation
-            await enqueue_fragment_generation(str(project.id), file_path, commit_hash)
-        except Exception as e:
-            logger.warning(f"Failed to queue fragment generation: {e}")
+    _queue_fragment_generation(project.id, file_path, commit_hash)
 
     return FileUploadResponse(commit_hash=commit_hash, file_path=file_path, message=message)
 
@@ -174,10 +291,12 @@ async def remove_file(
     db: AsyncSession = Depends(get_db),
 ):
     project = await require_project_access(slug, user, db, required_role="editor")
+    file_path = _normalize_repo_path(file_path)
 
-    commit_hash = git_svc.delete_file(
-        repo_path=project.git_repo_path,
-        file_path=file_path,
+    commit_hash = await git_svc.enqueue_write(
+        project.git_repo_path,
+        file_path,
+        delete=True,
         message=f"Delete {file_path}",
         author_name=user.username,
         author_email=user.email,
@@ -186,6 +305,7 @@ async def remove_file(
 
     if not commit_hash:
         raise HTTPException(status_code=404, detail="File not found")
+    await invalidate_head_commit(project.id, branch)
 
     return {"commit_hash": commit_hash, "message": f"Deleted {file_path}"}
 
@@ -197,21 +317,34 @@ async def get_log(
     slug: str,
     branch: str = Query("main"),
     limit: int = Query(50, le=200),
+    first_parent: bool = Query(True, description="Linear (first-parent) history only"),
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     project = await require_project_access(slug, user, db)
-    commits = git_svc.get_commit_log(project.git_repo_path, branch, limit)
-    return [
-        CommitResponse(
-            hash=c.hash,
-            message=c.message,
-            author_name=c.author_name,
-            author_email=c.author_email,
-            timestamp=c.timestamp,
+    repo_path = project.git_repo_path
+    tip = await asyncio.to_thread(git_svc.branch_tip, repo_path, branch)
+    if tip is None:
+        return []
+
+    async def _produce():
+        commits = await asyncio.to_thread(
+            git_svc.get_commit_log, repo_path, branch, limit, first_parent
         )
-        for c in commits
-    ]
+        return [
+            {
+                "hash": c.hash,
+                "message": c.message,
+                "author_name": c.author_name,
+                "author_email": c.author_email,
+                "timestamp": c.timestamp,
+            }
+            for c in commits
+        ]
+
+    return await get_or_set(
+        f"gitlog:{repo_path}:{tip}:{limit}:{int(first_parent)}", _GIT_CACHE_TTL, _produce
+    )
 
 
 @router.get("/{slug}/git/branches")
@@ -221,8 +354,16 @@ async def get_branches(
     db: AsyncSession = Depends(get_db),
 ):
     project = await require_project_access(slug, user, db)
-    branches = git_svc.list_branches(project.git_repo_path)
-    return {"branches": branches}
+    repo_path = project.git_repo_path
+    # The fingerprint covers every branch tip, so any ref move produces a
+    # fresh key and the old entry just expires.
+    fingerprint = await asyncio.to_thread(git_svc.branches_fingerprint, repo_path)
+
+    async def _produce():
+        branches = await asyncio.to_thread(git_svc.list_branches, repo_path)
+        return {"branches": branches}
+
+    return await get_or_set(f"gitbranches:{repo_path}:{fingerprint}", _GIT_CACHE_TTL, _produce)
 
 
 @router.post("/{slug}/git/branches")
@@ -233,7 +374,7 @@ async def create_new_branch(
     db: AsyncSession = Depends(get_db),
 ):
     project = await require_project_access(slug, user, db, required_role="editor")
-    result = git_svc.create_branch(project.git_repo_path, req.name, req.source)
+    result = await asyncio.to_thread(git_svc.create_branch, project.git_repo_path, req.name, req.source)
     if not result:
         raise HTTPException(status_code=400, detail="Source branch not found")
     return result
@@ -249,7 +390,7 @@ async def merge_branch(
     db: AsyncSession = Depends(get_db),
 ):
     project = await require_project_access(slug, user, db, required_role="editor")
-    result = merge_branches(
+    result = await merge_branches(
         repo_path=project.git_repo_path,
         source_branch=branch_name,
         target_branch=target,
@@ -259,6 +400,7 @@ async def merge_branch(
     )
     if result["status"] == "error":
         raise HTTPException(status_code=400, detail=result["message"])
+    await invalidate_head_commit(project.id, target)
     return result
 
 
@@ -271,7 +413,9 @@ async def get_diff(
     db: AsyncSession = Depends(get_db),
 ):
     project = await require_project_access(slug, user, db)
-    return get_diff_between_commits(project.git_repo_path, from_commit, to_commit)
+    return await asyncio.to_thread(
+        get_diff_between_commits, project.git_repo_path, from_commit, to_commit
+    )
 
 
 @router.get("/{slug}/git/diff/semantic")
@@ -284,4 +428,4 @@ async def get_semantic_diff(
     db: AsyncSession = Depends(get_db),
 ):
     project = await require_project_access(slug, user, db)
-    return get_semantic_ifc_diff(project.git_repo_path, from_commit, to_commit, file_path)
+    return await get_semantic_ifc_diff(project.git_repo_path, from_commit, to_commit, file_path)
@@ -1,9 +1,15 @@
+import asyncio
+import hashlib
 import logging
 import os
 import shutil
 import tempfile
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from pathlib import Path
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path, PurePosixPath
 
 import pygit2
 
@@ -30,9 +36,27 @@ def init_bare_repo(repo_path: str) -> pygit2.Repository:
     return repo
 
 
+# Shared Repository handles, one per repo path. Constructing a Repository
+# re-reads refs/config and reinitializes the ODB; libgit2 object reads are
+# thread-safe on a shared handle, so one handle per repo is enough.
+_REPO_CACHE: dict[str, pygit2.Repository] = {}
+_repo_cache_lock = threading.Lock()
+_write_locks: dict[str, threading.Lock] = {}
+
+
 def open_repo(repo_path: str) -> pygit2.Repository:
-    """Open an existing Git repository."""
-    return pygit2.Repository(repo_path)
+    """Open an existing Git repository, reusing a cached handle."""
+    with _repo_cache_lock:
+        repo = _REPO_CACHE.get(repo_path)
+        if repo is None:
+            repo = _REPO_CACHE[repo_path] = pygit2.Repository(repo_path)
+        return repo
+
+
+def write_lock(repo_path: str) -> threading.Lock:
+    """Per-repo lock serializing mutating operations (commits, ref updates)."""
+    with _repo_cache_lock:
+        return _write_locks.setdefault(repo_path, threading.Lock())
 
 
 def get_working_dir(project_slug: str, branch: str = "main") -> str:
@@ -54,25 +78,17 @@ def checkout_to_working_dir(repo_path: str, project_slug: str, branch: str = "ma
 
     ref = repo.references[ref_name]
     commit = repo.get(ref.target)
-    tree = commit.tree
 
-    _extract_tree(repo, tree, work_dir)
+    # checkout_tree extracts the whole tree in native code, instead of one
+    # repo.get() and open().write() round-trip per entry from Python.
+    repo.checkout_tree(
+        commit.tree,
+        directory=work_dir,
+        strategy=pygit2.GIT_CHECKOUT_FORCE | pygit2.GIT_CHECKOUT_RECREATE_MISSING,
+    )
     return work_dir
 
 
-def _extract_tree(repo: pygit2.Repository, tree: pygit2.Tree, dest: str):
-    """Recursively extract a Git tree to a directory."""
-    for entry in tree:
-        entry_path = os.path.join(dest, entry.name)
-        obj = repo.get(entry.id)
-        if obj.type == pygit2.GIT_OBJECT_BLOB:
-            with open(entry_path, "wb") as f:
-                f.write(obj.data)
-        elif obj.type == pygit2.GIT_OBJECT_TREE:
-            os.makedirs(entry_path, exist_ok=True)
-            _extract_tree(repo, obj, entry_path)
-
-
 def commit_file(
     repo_path: str,
     file_path: str,
@@ -84,6 +100,41 @@ def commit_file(
 ) -> str:
     """Add or update a file in the repo and create a commit. Returns commit hash."""
     repo = open_repo(repo_path)
+    with write_lock(repo_path):
+        blob_id = repo.create_blob(file_data)
+        return _commit_blob(repo, file_path, blob_id, message, author_name, author_email, branch)
+
+
+def commit_file_from_stream(
+    repo_path: str,
+    file_path: str,
+    stream,
+    message: str,
+    author_name: str,
+    author_email: str,
+    branch: str = "main",
+) -> str:
+    """
+    Like commit_file, but reads the blob content from a seekable binary
+    stream via libgit2's writestream, so the file is never held in memory
+    as a single bytes object.
+    """
+    repo = open_repo(repo_path)
+    with write_lock(repo_path):
+        blob_id = repo.create_blob_fromiobase(stream)
+        return _commit_blob(repo, file_path, blob_id, message, author_name, author_email, branch)
+
+
+def _commit_blob(
+    repo: pygit2.Repository,
+    file_path: str,
+    blob_id: pygit2.Oid,
+    message: str,
+    author_name: str,
+    author_email: str,
+    branch: str,
+) -> str:
+    """Insert an already-written blob at file_path and commit to branch."""
     ref_name = f"refs/heads/{branch}"
 
     # Build tree
@@ -97,19 +148,14 @@ def commit_file(
         parents = []
 
     # Handle nested paths: build tree hierarchy
-    parts = file_path.split("/")
+    parts = PurePosixPath(file_path).parts
     if len(parts) == 1:
         # Simple file at root
-        blob_id = repo.create_blob(file_data)
         tree_builder.insert(file_path, blob_id, pygit2.GIT_FILEMODE_BLOB)
+        tree_id = tree_builder.write()
     else:
-        # Nested: need to build subtrees
-        blob_id = repo.create_blob(file_data)
+        # Nested: rebuild the subtree chain, one write per level
         tree_id = _insert_nested(repo, tree_builder, parts, blob_id)
-        # tree_builder already has the root entry inserted
-        pass
-
-    tree_id = tree_builder.write()
 
     # Create commit
     sig = pygit2.Signature(author_name, author_email)
@@ -132,29 +178,32 @@ def _insert_nested(
     parts: list[str],
     blob_id: pygit2.Oid,
 ) -> pygit2.Oid:
-    """Insert a blob at a nested path by building subtrees."""
-    if len(parts) == 1:
-        parent_builder.insert(parts[0], blob_id, pygit2.GIT_FILEMODE_BLOB)
-        return parent_builder.write()
-
-    dir_name = parts[0]
-    remaining = parts[1:]
-
-    # Check if directory already exists in parent
-    try:
-        existing = parent_builder.get(dir_name)
+    """
+    Insert a blob at a nested path, returning the new root tree oid.
+
+    Walks the directory parts top-down collecting one TreeBuilder per
+    level (reusing existing subtrees where present), inserts the blob at
+    the leaf, then unwinds bottom-up writing each builder exactly once.
+    """
+    builders = [parent_builder]
+    for dir_name in parts[:-1]:
+        try:
+            existing = builders[-1].get(dir_name)
+        except Exception:
+            existing = None
         if existing:
-            sub_tree = repo.get(existing.id)
-            sub_builder = repo.TreeBuilder(sub_tree)
+            sub_builder = repo.TreeBuilder(repo.get(existing.id))
         else:
             sub_builder = repo.TreeBuilder()
-    except Exception:
-        sub_builder = repo.TreeBuilder()
+        builders.append(sub_builder)
+
+    builders[-1].insert(parts[-1], blob_id, pygit2.GIT_FILEMODE_BLOB)
 
-    _insert_nested(repo, sub_builder, remaining, blob_id)
-    sub_tree_id = sub_builder.write()
-    parent_builder.insert(dir_name, sub_tree_id, pygit2.GIT_FILEMODE_TREE)
-    return parent_builder.write()
+    tree_id = builders[-1].write()
+    for dir_name, builder in zip(reversed(parts[:-1]), reversed(builders[:-1])):
+        builder.insert(dir_name, tree_id, pygit2.GIT_FILEMODE_TREE)
+        tree_id = builder.write()
+    return tree_id
 
 
 def delete_file(
@@ -169,27 +218,84 @@ def delete_file(
     repo = open_repo(repo_path)
     ref_name = f"refs/heads/{branch}"
 
-    if ref_name not in repo.references:
-        return None
+    with write_lock(repo_path):
+        if ref_name not in repo.references:
+            return None
 
-    ref = repo.references[ref_name]
-    parent_commit = repo.get(ref.target)
-    tree_builder = repo.TreeBuilder(parent_commit.tree)
+        ref = repo.references[ref_name]
+        parent_commit = repo.get(ref.target)
+        tree_builder = repo.TreeBuilder(parent_commit.tree)
 
-    try:
-        tree_builder.remove(file_path)
-    except KeyError:
+        try:
+            tree_builder.remove(file_path)
+        except KeyError:
+            return None
+
+        tree_id = tree_builder.write()
+        sig = pygit2.Signature(author_name, author_email)
+        commit_id = repo.create_commit(
+            ref_name, sig, sig, message, tree_id, [parent_commit.id]
+        )
+        return str(commit_id)
+
+
+# Commits, trees and blobs are content-addressed and immutable, so
+# anything keyed by an oid can be memoized forever; only the ref -> oid
+# resolution has to stay live.
+
+@lru_cache(maxsize=4096)
+def _commit_info(repo_path: str, oid_hex: str) -> CommitInfo:
+    """Immutable metadata projection of a single commit."""
+    commit = open_repo(repo_path).get(pygit2.Oid(hex=oid_hex))
+    return CommitInfo(
+        hash=oid_hex,
+        message=commit.message.strip(),
+        author_name=commit.author.name,
+        author_email=commit.author.email,
+        timestamp=commit.commit_time,
+    )
+
+
+@lru_cache(maxsize=1024)
+def _log_from_tip(
+    repo_path: str, tip_hex: str, limit: int, first_parent: bool = False
+) -> tuple[CommitInfo, ...]:
+    """History starting at a fixed tip oid; safe to cache since the walk
+    below an oid can never change."""
+    repo = open_repo(repo_path)
+    walker = repo.walk(pygit2.Oid(hex=tip_hex), pygit2.GIT_SORT_TIME)
+    if first_parent:
+        # Linear history is what the UI log shows; skipping merge side
+        # branches keeps the revwalk frontier to a single line.
+        walker.simplify_first_parent()
+    return tuple(
+        _commit_info(repo_path, str(commit.id)) for commit in islice(walker, limit)
+    )
+
+
+def branch_tip(repo_path: str, branch: str) -> str | None:
+    """Resolve a branch to its tip oid, or None if the branch is missing."""
+    repo = open_repo(repo_path)
+    ref_name = f"refs/heads/{branch}"
+    if ref_name not in repo.references:
         return None
+    return str(repo.references[ref_name].target)
 
-    tree_id = tree_builder.write()
-    sig = pygit2.Signature(author_name, author_email)
-    commit_id = repo.create_commit(
-        ref_name, sig, sig, message, tree_id, [parent_commit.id]
+
+def branches_fingerprint(repo_path: str) -> str:
+    """Digest over all branch name/tip pairs; changes whenever any ref moves."""
+    repo = open_repo(repo_path)
+    parts = sorted(
+        f"{ref_name}:{repo.references[ref_name].target}"
+        for ref_name in repo.references
+        if ref_name.startswith("refs/heads/")
     )
-    return str(commit_id)
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
 
 
-def get_commit_log(repo_path: str, branch: str = "main", limit: int = 50) -> list[CommitInfo]:
+def get_commit_log(
+    repo_path: str, branch: str = "main", limit: int = 50, first_parent: bool = False
+) -> list[CommitInfo]:
     """Get commit history for a branch."""
     repo = open_repo(repo_path)
     ref_name = f"refs/heads/{branch}"
@@ -197,29 +303,21 @@ def get_commit_log(repo_path: str, branch: str = "main", limit: int = 50) -> lis
     if ref_name not in repo.references:
         return []
 
-    ref = repo.references[ref_name]
-    commits = []
-    for commit in repo.walk(ref.target, pygit2.GIT_SORT_TIME):
-        commits.append(CommitInfo(
-            hash=str(commit.id),
-            message=commit.message.strip(),
-            author_name=commit.author.name,
-            author_email=commit.author.email,
-            timestamp=commit.commit_time,
-        ))
-        if len(commits) >= limit:
-            break
-
-    return commits
-
-
-def list_files(repo_path: str, branch: str = "main", path: str = "") -> list[dict]:
-    """List files in a branch at a given path."""
+    tip = repo.references[ref_name].target
+    return list(_log_from_tip(repo_path, str(tip), limit, first_parent))
+
+
+def list_files(repo_path: str, branch: str = "main", path: str = "") -> tuple[str | None, list[dict]]:
+    """List files in a branch at a given path.
+
+    Returns (tree oid, entries); the tree oid is a strong ETag for the
+    listing since any change below the path produces a new tree.
+    """
     repo = open_repo(repo_path)
     ref_name = f"refs/heads/{branch}"
 
     if ref_name not in repo.references:
-        return []
+        return None, []
 
     ref = repo.references[ref_name]
     commit = repo.get(ref.target)
@@ -227,25 +325,27 @@ def list_files(repo_path: str, branch: str = "main", path: str = "") -> list[dic
 
     # Navigate to path
     if path:
-        for part in path.strip("/").split("/"):
-            entry = tree[part]
-            tree = repo.get(entry.id)
+        tree = repo.get(tree[path.strip("/")].id)
 
     files = []
     for entry in tree:
-        obj = repo.get(entry.id)
+        # The entry itself knows its type; only blobs need an object
+        # lookup, and Blob.size reads the raw size without copying the
+        # payload into a Python bytes object like len(obj.data) did.
+        is_tree = entry.type_str == "tree"
         files.append({
             "name": entry.name,
-            "type": "dir" if obj.type == pygit2.GIT_OBJECT_TREE else "file",
-            "size": len(obj.data) if obj.type == pygit2.GIT_OBJECT_BLOB else None,
+            "type": "dir" if is_tree else "file",
+            "size": None if is_tree else repo.get(entry.id).size,
             "oid": str(entry.id),
         })
 
-    return files
+    return str(tree.id), files
 
 
-def get_file_content(repo_path: str, file_path: str, branch: str = "main") -> bytes | None:
-    """Get the content of a file from a branch."""
+def get_file_entry(repo_path: str, file_path: str, branch: str = "main") -> tuple[str, bytes] | None:
+    """Get (blob oid, content) of a file from a branch. The oid doubles as
+    a strong ETag since blobs are content-addressed."""
     repo = open_repo(repo_path)
     ref_name = f"refs/heads/{branch}"
 
@@ -254,38 +354,146 @@ def get_file_content(repo_path: str, file_path: str, branch: str = "main") -> by
 
     ref = repo.references[ref_name]
     commit = repo.get(ref.target)
-    tree = commit.tree
 
     try:
-        parts = file_path.strip("/").split("/")
-        for part in parts[:-1]:
-            entry = tree[part]
-            tree = repo.get(entry.id)
-        entry = tree[parts[-1]]
+        entry = commit.tree[file_path.strip("/")]
+        return str(entry.id), repo.get(entry.id).data
+    except (KeyError, TypeError):
+        return None
+
+
+def get_file_content(repo_path: str, file_path: str, branch: str = "main") -> bytes | None:
+    """Get the content of a file from a branch."""
+    found = get_file_entry(repo_path, file_path, branch)
+    return found[1] if found else None
+
+
+_BLOB_CHUNK = 1 << 20
+
+
+def open_blob_stream(
+    repo_path: str,
+    file_path: str,
+    branch: str = "main",
+    commit_hash: str | None = None,
+):
+    """
+    Resolve a file to (blob oid, size, chunk iterator) for streaming
+    responses. Chunks are sliced off the blob's buffer one at a time, so
+    the whole payload is never copied into a single Python bytes object.
+    """
+    repo = open_repo(repo_path)
+
+    if commit_hash:
+        commit = _resolve_commit(repo, commit_hash)
+        if not commit:
+            return None
+    else:
+        ref_name = f"refs/heads/{branch}"
+        if ref_name not in repo.references:
+            return None
+        commit = repo.get(repo.references[ref_name].target)
+
+    try:
+        entry = commit.tree[file_path.strip("/")]
         blob = repo.get(entry.id)
-        return blob.data
+        size = blob.size
     except (KeyError, TypeError):
         return None
 
+    def _chunks():
+        # The memoryview keeps the blob (and its libgit2 buffer) alive
+        # for the duration of the response.
+        view = memoryview(blob)
+        for i in range(0, size, _BLOB_CHUNK):
+            yield bytes(view[i:i + _BLOB_CHUNK])
+
+    return str(entry.id), size, _chunks()
+
+
+# The blob cache is bounded by bytes, not entry count: IFC payloads reach
+# multi-GB, so an entry-count LRU would pin unbounded memory. Blobs over
+# the per-entry threshold are read from the odb on every call instead.
+_BLOB_CACHE_MAX_ENTRY = 8 << 20
+_BLOB_CACHE_MAX_BYTES = 256 << 20
+_blob_cache: "OrderedDict[tuple[str, str, str], tuple[str, bytes] | None]" = OrderedDict()
+_blob_cache_bytes = 0
+_blob_cache_lock = threading.Lock()
+
+
+def _blob_at(repo_path: str, commitish: str, file_path: str) -> tuple[str, bytes] | None:
+    """(oid, content) of a blob at a fixed commit.
+
+    The commitish is resolved before the cache is consulted, so entries —
+    including cached misses — are keyed on the immutable commit oid, never
+    on a mutable ref or revspec like "main" or "HEAD~1". Only the cheap
+    revparse repeats on that path; hits never revalidate, and eviction is
+    least-recently-used against the byte budget.
+    """
+    global _blob_cache_bytes
 
-def get_file_content_at_commit(repo_path: str, file_path: str, commit_hash: str) -> bytes | None:
-    """Get the content of a file at a specific commit."""
     repo = open_repo(repo_path)
-    commit = repo.get(pygit2.Oid(hex=commit_hash))
+    commit = _resolve_commit(repo, commitish)
     if not commit:
         return None
 
-    tree = commit.tree
+    key = (repo_path, str(commit.id), file_path)
+    with _blob_cache_lock:
+        if key in _blob_cache:
+            _blob_cache.move_to_end(key)
+            return _blob_cache[key]
+
     try:
-        parts = file_path.strip("/").split("/")
-        for part in parts[:-1]:
-            entry = tree[part]
-            tree = repo.get(entry.id)
-        entry = tree[parts[-1]]
-        blob = repo.get(entry.id)
-        return blob.data
+        entry = commit.tree[file_path.strip("/")]
+        found = str(entry.id), repo.get(entry.id).data
     except (KeyError, TypeError):
+        found = None
+
+    # Misses are cached too (also immutable at a fixed commit) at zero cost.
+    size = len(found[1]) if found else 0
+    if size <= _BLOB_CACHE_MAX_ENTRY:
+        with _blob_cache_lock:
+            if key not in _blob_cache:
+                _blob_cache[key] = found
+                _blob_cache_bytes += size
+                while _blob_cache_bytes > _BLOB_CACHE_MAX_BYTES and _blob_cache:
+                    _, evicted = _blob_cache.popitem(last=False)
+                    _blob_cache_bytes -= len(evicted[1]) if evicted else 0
+    return found
+
+
+def _resolve_commit(repo: pygit2.Repository, commitish: str) -> pygit2.Commit | None:
+    """Resolve a full/abbreviated hash, ref name or revspec to a commit.
+
+    revparse_single handles abbreviation and revspecs like HEAD~1 in a
+    single libgit2 call, instead of raising on anything but 40-char hex.
+    """
+    try:
+        obj = repo.revparse_single(commitish)
+    except (KeyError, ValueError, pygit2.GitError):
         return None
+    return obj.peel(pygit2.Commit) if obj is not None else None
+
+
+def resolve_commit_oid(repo_path: str, commitish: str) -> str | None:
+    """Full commit oid for a hash/ref/revspec, or None if it doesn't resolve.
+
+    Callers that use a commit as a cache key or client-facing validator
+    must normalize through this first: only the full oid is immutable.
+    """
+    commit = _resolve_commit(open_repo(repo_path), commitish)
+    return str(commit.id) if commit else None
+
+
+def get_file_entry_at_commit(repo_path: str, file_path: str, commit_hash: str) -> tuple[str, bytes] | None:
+    """Get (blob oid, content) of a file at a specific commit."""
+    return _blob_at(repo_path, commit_hash, file_path)
+
+
+def get_file_content_at_commit(repo_path: str, file_path: str, commit_hash: str) -> bytes | None:
+    """Get the content of a file at a specific commit."""
+    found = _blob_at(repo_path, commit_hash, file_path)
+    return found[1] if found else None
 
 
 def list_branches(repo_path: str) -> list[dict]:
@@ -295,13 +503,14 @@ def list_branches(repo_path: str) -> list[dict]:
     for ref_name in repo.references:
         if ref_name.startswith("refs/heads/"):
             branch_name = ref_name[len("refs/heads/"):]
-            ref = repo.references[ref_name]
-            commit = repo.get(ref.target)
+            # The ref -> oid resolution stays live; the per-commit
+            # projection is immutable and comes from the cache.
+            info = _commit_info(repo_path, str(repo.references[ref_name].target))
             branches.append({
                 "name": branch_name,
-                "commit": str(commit.id),
-                "message": commit.message.strip(),
-                "timestamp": commit.commit_time,
+                "commit": info.hash,
+                "message": info.message,
+                "timestamp": info.timestamp,
             })
     return branches
 
@@ -318,10 +527,183 @@ def create_branch(repo_path: str, branch_name: str, source_branch: str = "main")
     commit = repo.get(ref.target)
 
     new_ref = f"refs/heads/{branch_name}"
-    repo.references.create(new_ref, commit.id)
+    with write_lock(repo_path):
+        repo.references.create(new_ref, commit.id)
 
     return {
         "name": branch_name,
         "commit": str(commit.id),
         "source": source_branch,
     }
+
+
+# --- Queued writes ---------------------------------------------------------
+#
+# Concurrent uploads against the same repo each paid for their own tree
+# write, commit and ref fsync, serialized on the per-repo write lock. The
+# routes instead enqueue writes here; one worker task per repo drains the
+# queue, coalescing items that arrive within a short debounce window for
+# the same (branch, author) into a single tree + commit. Every waiter gets
+# the resulting commit hash. Mirrors the background flush pattern used for
+# the fragment cache.
+
+_WRITE_DEBOUNCE = 0.05
+
+_write_queues: dict[str, asyncio.Queue] = {}
+_write_workers: dict[str, asyncio.Task] = {}
+
+
+@dataclass
+class _QueuedWrite:
+    file_path: str
+    data: bytes | None          # in-memory payload
+    stream: object | None       # seekable binary stream
+    disk_path: str | None       # on-disk payload, hashed natively by libgit2
+    delete: bool
+    message: str
+    author_name: str
+    author_email: str
+    branch: str
+    future: asyncio.Future
+
+
+async def enqueue_write(
+    repo_path: str,
+    file_path: str,
+    *,
+    data: bytes | None = None,
+    stream=None,
+    disk_path: str | None = None,
+    delete: bool = False,
+    message: str,
+    author_name: str,
+    author_email: str,
+    branch: str = "main",
+) -> str | None:
+    """
+    Queue a file write/delete for the repo's writer task and wait for the
+    commit hash. Returns None for a delete whose path did not exist.
+    """
+    loop = asyncio.get_running_loop()
+    item = _QueuedWrite(
+        file_path=file_path,
+        data=data,
+        stream=stream,
+        disk_path=disk_path,
+        delete=delete,
+        message=message,
+        author_name=author_name,
+        author_email=author_email,
+        branch=branch,
+        future=loop.create_future(),
+    )
+    queue = _write_queues.get(repo_path)
+    if queue is None:
+        queue = _write_queues[repo_path] = asyncio.Queue()
+        _write_workers[repo_path] = loop.create_task(_write_worker(repo_path, queue))
+    queue.put_nowait(item)
+    return await item.future
+
+
+async def _write_worker(repo_path: str, queue: asyncio.Queue):
+    while True:
+        batch = [await queue.get()]
+        # Pull in everything that lands within the debounce window so a
+        # burst of uploads fuses into as few commits as possible.
+        while True:
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), _WRITE_DEBOUNCE))
+            except asyncio.TimeoutError:
+                break
+
+        groups: dict[tuple[str, str, str], list[_QueuedWrite]] = {}
+        for item in batch:
+            groups.setdefault((item.branch, item.author_name, item.author_email), []).append(item)
+
+        for (branch, author_name, author_email), items in groups.items():
+            try:
+                results = await asyncio.to_thread(
+                    _apply_write_batch, repo_path, branch, author_name, author_email, items
+                )
+            except Exception as e:
+                for item in items:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+            else:
+                for item, result in zip(items, results):
+                    if item.future.done():
+                        continue
+                    if isinstance(result, Exception):
+                        item.future.set_exception(result)
+                    else:
+                        item.future.set_result(result)
+
+
+def _apply_write_batch(
+    repo_path: str,
+    branch: str,
+    author_name: str,
+    author_email: str,
+    items: list[_QueuedWrite],
+) -> list[str | None | Exception]:
+    """Apply a group of queued writes as one tree and one commit."""
+    repo = open_repo(repo_path)
+    ref_name = f"refs/heads/{branch}"
+
+    with write_lock(repo_path):
+        if ref_name in repo.references:
+            parent_commit = repo.get(repo.references[ref_name].target)
+            tree_builder = repo.TreeBuilder(parent_commit.tree)
+            parents = [parent_commit.id]
+        else:
+            tree_builder = repo.TreeBuilder()
+            parents = []
+
+        # A failing item records its exception and is left out of the
+        # commit; its batch-mates still land.
+        results: list[str | None | Exception] = [None] * len(items)
+        applied: list[int] = []
+        for idx, item in enumerate(items):
+            try:
+                if item.delete:
+                    try:
+                        tree_builder.remove(item.file_path)
+                    except (KeyError, pygit2.GitError):
+                        continue  # missing path: result stays None
+                else:
+                    if item.disk_path is not None:
+                        # libgit2 reads, hashes and deflates straight from the
+                        # file, keeping the payload out of Python and the GIL
+                        # out of the SHA-1/zlib work.
+                        blob_id = repo.create_blob_fromdisk(item.disk_path)
+                    elif item.stream is not None:
+                        blob_id = repo.create_blob_fromiobase(item.stream)
+                    else:
+                        blob_id = repo.create_blob(item.data)
+                    parts = PurePosixPath(item.file_path).parts
+                    if len(parts) == 1:
+                        tree_builder.insert(item.file_path, blob_id, pygit2.GIT_FILEMODE_BLOB)
+                    else:
+                        _insert_nested(repo, tree_builder, parts, blob_id)
+            except Exception as e:
+                results[idx] = e
+                continue
+            applied.append(idx)
+
+        if not applied:
+            return results
+
+        tree_id = tree_builder.write()
+
+        # Preserve the individual messages when commits are fused.
+        messages = list(dict.fromkeys(items[idx].message for idx in applied))
+        message = "\n".join(messages)
+
+        sig = pygit2.Signature(author_name, author_email)
+        commit_id = repo.create_commit(ref_name, sig, sig, message, tree_id, parents)
+        logger.info(f"Created commit {commit_id} on {branch} ({len(applied)} queued writes)")
+
+        commit_hex = str(commit_id)
+        for idx in applied:
+            results[idx] = commit_hex
+        return results
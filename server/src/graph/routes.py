@@ -1,6 +1,8 @@
 """API routes for IFC graph database operations."""
+import asyncio
 import logging
 import uuid
+from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
@@ -9,6 +11,7 @@ from src.auth.models import User
 from src.config import settings
 from src.graph.service import (
     get_graph_data,
+    get_graph_overview,
     get_graph_stats,
     get_import_progress,
     import_ifc_to_graph,
@@ -43,6 +46,19 @@ async def get_project_graph(
     return data
 
 
+@router.get("/{slug}/graph/overview")
+async def get_project_graph_overview(
+    slug: str,
+    ifc_class: str | None = Query(None, description="Filter by IFC class"),
+    depth: int = Query(2, ge=1, le=5, description="Traversal depth"),
+    limit: int = Query(200, ge=1, le=1000, description="Max nodes"),
+    user: User = Depends(get_current_user),
+):
+    """Graph data and stats in one request (overview page)."""
+    _check_neo4j_enabled()
+    return await get_graph_overview(slug, ifc_class=ifc_class, depth=depth, limit=limit)
+
+
 @router.get("/{slug}/graph/stats")
 async def get_project_graph_stats(
     slug: str,
@@ -97,10 +113,17 @@ async def import_to_graph(
     Returns a job_id that can be polled via GET /{slug}/graph/import/{job_id}.
     """
     _check_neo4j_enabled()
-    import os
-    ifc_file = os.path.join(settings.repos_dir, slug, file_path)
-    if not os.path.exists(ifc_file):
+    # Resolve before touching disk and refuse paths that escape the repo
+    # root; the existence check runs off the event loop since stat() can
+    # stall on network filesystems.
+    candidate = Path(settings.repos_dir, slug, file_path)
+    ifc_path = await asyncio.to_thread(candidate.resolve)
+    repos_root = await asyncio.to_thread(Path(settings.repos_dir).resolve)
+    if not ifc_path.is_relative_to(repos_root):
+        raise HTTPException(status_code=400, detail="Invalid file path")
+    if not await asyncio.to_thread(ifc_path.exists):
         raise HTTPException(status_code=404, detail=f"IFC file not found: {file_path}")
+    ifc_file = str(ifc_path)
 
     job_id = str(uuid.uuid4())[:12]
 
@@ -3,6 +3,13 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 from src.config import settings
 from src.db.database import init_db
@@ -39,9 +46,28 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"Neo4j not available: {e}")
 
+    # Batch FragmentCache inserts off the request path
+    import asyncio
+    from src.fragments.service import flush_fragment_cache_writes
+    cache_flush_task = asyncio.create_task(flush_fragment_cache_writes())
+
+    # Blocking pygit2 work runs through asyncio.to_thread; give the default
+    # executor enough threads that git calls don't queue behind each other
+    # under concurrent requests.
+    from concurrent.futures import ThreadPoolExecutor
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=32, thread_name_prefix="gitio")
+    )
+
     logger.info("IfcGit Server ready.")
     yield
 
+    cache_flush_task.cancel()
+
+    # Close the shared HTTP client used for integration connection tests
+    from src.auth.erpnext import close_client
+    await close_client()
+
     # Cleanup Neo4j
     if settings.neo4j_enabled:
         try:
@@ -57,10 +83,21 @@ app = FastAPI(
     description="Open-source IFC version control and collaboration server",
     version="0.1.0",
     lifespan=lifespan,
+    # orjson handles datetime/UUID natively in C, replacing the
+    # jsonable_encoder + json.dumps pass on every response.
+    default_response_class=ORJSONResponse,
     docs_url="/api/docs",
     openapi_url="/api/openapi.json",
 )
 
+# Diff, log and graph responses are large, highly compressible JSON/text;
+# level 5 keeps the CPU cost well under the bandwidth saved. Brotli is
+# preferred when installed, with gzip as the baseline for other clients.
+if BrotliMiddleware:
+    app.add_middleware(BrotliMiddleware, quality=4, minimum_size=1024)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins_list,
@@ -66,9 +66,10 @@ class ProjectFilesCollection(DAVCollection):
     def get_member_names(self):
         from src.git.service import list_files
         try:
-            files = list_files(self._repo_path, branch="main")
+            _tree_oid, files = list_files(self._repo_path, branch="main")
             return [f["name"] for f in files]
         except Exception:
+            logger.exception(f"WebDAV listing failed for {self._repo_path}")
             return []
 
     def get_member(self, name):
@@ -1,10 +1,10 @@
 """
-Unit tests for the Fernet encrypt / decrypt helpers in ``src.auth.erpnext``.
+Unit tests for the encrypt / decrypt helpers in ``src.auth.erpnext``.
 """
 
 import pytest
 
-from src.auth.erpnext import encrypt_secret, decrypt_secret
+from src.auth.erpnext import encrypt_secret, decrypt_secret, _get_fernet
 
 
 SECRET_KEY = "test-secret-key-for-unit-tests"
@@ -43,10 +43,19 @@ class TestDecryptWithWrongKey:
         assert result == ""
 
 
+class TestLegacyFernetFallback:
+    """Secrets stored before the AES-GCM switch must still decrypt."""
+
+    def test_fernet_ciphertext_still_decrypts(self):
+        plaintext = "pre-migration-secret"
+        legacy_cipher = _get_fernet(SECRET_KEY).encrypt(plaintext.encode()).decode()
+        assert decrypt_secret(legacy_cipher, SECRET_KEY) == plaintext
+
+
 class TestCiphertextUniqueness:
     """
-    Fernet tokens include a timestamp and random IV, so encrypting the
-    same plaintext twice must produce different ciphertext.
+    Ciphertexts include a random nonce, so encrypting the same plaintext
+    twice must produce different output.
     """
 
     def test_different_ciphertext_each_call(self):
@@ -65,7 +74,7 @@ class TestEmptyStringHandling:
     def test_encrypt_empty_string(self):
         cipher = encrypt_secret("", SECRET_KEY)
         assert isinstance(cipher, str)
-        assert len(cipher) > 0  # Fernet always produces output
+        assert len(cipher) > 0  # nonce + auth tag always produce output
 
     def test_roundtrip_empty_string(self):
         cipher = encrypt_secret("", SECRET_KEY)
@@ -0,0 +1,117 @@
+"""
+Tests for the debounced git write queue in ``src.git.service``.
+
+Each test uses its own freshly initialised bare repository so that the
+per-repo writer task is created on the test's event loop.
+"""
+
+import asyncio
+
+import pytest
+
+from src.git.service import (
+    enqueue_write,
+    get_commit_log,
+    get_file_content,
+    init_bare_repo,
+)
+
+
+@pytest.fixture()
+def bare_repo(tmp_path) -> str:
+    """Path of a fresh bare repository."""
+    repo_path = str(tmp_path / "repo.git")
+    init_bare_repo(repo_path)
+    return repo_path
+
+
+async def _enqueue_upload(repo_path: str, file_path: str, data: bytes, message: str):
+    return await enqueue_write(
+        repo_path,
+        file_path,
+        data=data,
+        message=message,
+        author_name="Test User",
+        author_email="test@example.com",
+    )
+
+
+class TestWriteCoalescing:
+    """Writes landing within the debounce window fuse into one commit."""
+
+    async def test_two_uploads_share_one_commit(self, bare_repo):
+        hash_a, hash_b = await asyncio.gather(
+            _enqueue_upload(bare_repo, "a.ifc", b"ISO-10303-21; A", "Add a.ifc"),
+            _enqueue_upload(bare_repo, "b.ifc", b"ISO-10303-21; B", "Add b.ifc"),
+        )
+        assert hash_a == hash_b
+
+        log = get_commit_log(bare_repo, branch="main", limit=10)
+        assert len(log) == 1
+        # Both individual messages are preserved in the fused commit.
+        assert "Add a.ifc" in log[0].message
+        assert "Add b.ifc" in log[0].message
+
+        assert get_file_content(bare_repo, "a.ifc") == b"ISO-10303-21; A"
+        assert get_file_content(bare_repo, "b.ifc") == b"ISO-10303-21; B"
+
+    async def test_different_authors_get_separate_commits(self, bare_repo):
+        hash_a, hash_b = await asyncio.gather(
+            _enqueue_upload(bare_repo, "a.ifc", b"A", "Add a.ifc"),
+            enqueue_write(
+                bare_repo,
+                "b.ifc",
+                data=b"B",
+                message="Add b.ifc",
+                author_name="Other User",
+                author_email="other@example.com",
+            ),
+        )
+        assert hash_a != hash_b
+        log = get_commit_log(bare_repo, branch="main", limit=10)
+        assert len(log) == 2
+
+
+class TestWriteFailureIsolation:
+    """A failing item must not poison the rest of its batch."""
+
+    async def test_bad_payload_fails_only_its_own_write(self, bare_repo):
+        good = _enqueue_upload(bare_repo, "good.ifc", b"fine", "Add good.ifc")
+        # An int payload makes create_blob raise inside the batch apply.
+        bad = _enqueue_upload(bare_repo, "bad.ifc", 12345, "Add bad.ifc")
+
+        good_result, bad_result = await asyncio.gather(good, bad, return_exceptions=True)
+
+        assert isinstance(good_result, str)
+        assert isinstance(bad_result, Exception)
+        assert get_file_content(bare_repo, "good.ifc") == b"fine"
+        assert get_file_content(bare_repo, "bad.ifc") is None
+
+
+class TestQueuedDelete:
+    """Deletes resolve to the commit hash, or None for a missing path."""
+
+    async def test_delete_existing_file(self, bare_repo):
+        await _enqueue_upload(bare_repo, "doomed.ifc", b"bye", "Add doomed.ifc")
+        result = await enqueue_write(
+            bare_repo,
+            "doomed.ifc",
+            delete=True,
+            message="Delete doomed.ifc",
+            author_name="Test User",
+            author_email="test@example.com",
+        )
+        assert isinstance(result, str)
+        assert get_file_content(bare_repo, "doomed.ifc") is None
+
+    async def test_delete_missing_path_returns_none(self, bare_repo):
+        # None is what the route layer maps to a 404.
+        result = await enqueue_write(
+            bare_repo,
+            "never-existed.ifc",
+            delete=True,
+            message="Delete never-existed.ifc",
+            author_name="Test User",
+            author_email="test@example.com",
+        )
+        assert result is None